@@ -3,21 +3,95 @@ Document Storage Manager for EchoInk Agent
 Handles S3 operations for document persistence and retrieval
 """
 
+import base64
 import boto3
-import json
+import codecs
+import orjson
 import os
-from datetime import datetime
-from typing import Optional, Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, Callable
 from pathlib import Path
+from botocore.config import Config
+from botocore.exceptions import ClientError
+import zstandard
 import logging
 
 logger = logging.getLogger(__name__)
 
 # Get AWS configuration
-ACCOUNT_ID = boto3.client('sts').get_caller_identity()['Account']
-BUCKET_NAME = f"echo-docs-{ACCOUNT_ID}"
 REGION = os.getenv("AWS_REGION", "us-west-2")
 
+# Shared S3 client (thread-safe); keeps the HTTPS keep-alive pool across sessions
+_S3 = boto3.client(
+    's3',
+    region_name=REGION,
+    config=Config(max_pool_connections=32, retries={'max_attempts': 3, 'mode': 'adaptive'}),
+)
+
+
+@lru_cache(maxsize=1)
+def _fetch_account_id() -> str:
+    """Look up the AWS account ID via STS, once per process"""
+    return boto3.client('sts').get_caller_identity()['Account']
+
+
+@lru_cache(maxsize=1)
+def _get_bucket_name() -> str:
+    """Resolve the document bucket name; AWS_ACCOUNT_ID avoids the STS call"""
+    account_id = os.getenv("AWS_ACCOUNT_ID") or _fetch_account_id()
+    return f"echo-docs-{account_id}"
+
+
+# Retries for optimistic-concurrency conflicts when updating the session index
+INDEX_UPDATE_ATTEMPTS = 5
+_INDEX_CONFLICT_CODES = ('PreconditionFailed', 'ConditionalRequestConflict')
+
+# Markdown bodies are stored zstd-compressed; legacy objects are plain UTF-8
+ZSTD_LEVEL = 3
+BODY_ENCODING = f"zstd-{ZSTD_LEVEL}"
+BODY_CHUNK_SIZE = 64 * 1024
+
+# S3 caps user-defined metadata (keys + values) at 2 KB per object
+MAX_USER_METADATA_BYTES = 2048
+
+
+def _with_embedded_metadata(headers: Dict[str, str], metadata: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Add the document metadata to S3 user-metadata headers as base64 JSON
+    ('meta-json') so readers can skip the sidecar GET. Left out if it won't fit.
+    """
+    encoded = base64.b64encode(orjson.dumps(metadata)).decode('ascii')
+    candidate = {**headers, 'meta-json': encoded}
+    size = sum(len(key) + len(value.encode('utf-8')) for key, value in candidate.items())
+    return candidate if size <= MAX_USER_METADATA_BYTES else headers
+
+
+def _decode_body(response: Dict[str, Any]) -> str:
+    """Read a markdown body in chunks, decompressing it if it was stored with zstd"""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    decompressor = None
+    if response.get('ContentEncoding') == 'zstd':
+        decompressor = zstandard.ZstdDecompressor().decompressobj()
+
+    parts = []
+    for chunk in response['Body'].iter_chunks(BODY_CHUNK_SIZE):
+        if decompressor is not None:
+            chunk = decompressor.decompress(chunk)
+        parts.append(decoder.decode(chunk))
+    parts.append(decoder.decode(b'', final=True))
+    return ''.join(parts)
+
+
+def _embedded_metadata(response: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Decode metadata embedded by _with_embedded_metadata, if present"""
+    encoded = response.get('Metadata', {}).get('meta-json')
+    if not encoded:
+        return None
+    return orjson.loads(base64.b64decode(encoded))
+
+
 class DocumentStorageManager:
     """Manages document storage and retrieval in S3"""
 
@@ -29,9 +103,10 @@ class DocumentStorageManager:
             session_id: Unique session identifier for document isolation
         """
         self.session_id = session_id
-        self.s3_client = boto3.client('s3', region_name=REGION)
-        self.bucket_name = BUCKET_NAME
+        self.s3_client = _S3
+        self.bucket_name = _get_bucket_name()
         self.session_prefix = f"sessions/{session_id}"
+        self.index_key = f"{self.session_prefix}/documents/_index.json"
 
     def _get_document_key(self, doc_id: str, extension: str) -> str:
         """Generate S3 key for a document"""
@@ -41,6 +116,82 @@ class DocumentStorageManager:
         """Generate S3 key for document metadata"""
         return f"{self.session_prefix}/documents/{doc_id}_metadata.json"
 
+    def _read_index(self) -> tuple:
+        """Read the session index, returning (index, etag); etag is None if absent"""
+        try:
+            response = self.s3_client.get_object(
+                Bucket=self.bucket_name,
+                Key=self.index_key
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+                return {}, None
+            raise
+        return orjson.loads(response['Body'].read()), response['ETag']
+
+    def _write_index(self, index: Dict[str, Any], etag: Optional[str]) -> None:
+        """Write the session index, failing if it changed since it was read"""
+        condition = {'IfMatch': etag} if etag else {'IfNoneMatch': '*'}
+        self.s3_client.put_object(
+            Bucket=self.bucket_name,
+            Key=self.index_key,
+            Body=orjson.dumps(index),
+            ContentType='application/json',
+            **condition
+        )
+
+    def _update_index(self, mutate: Callable[[Dict[str, Any]], None]) -> None:
+        """
+        Apply a change to the session index with optimistic concurrency.
+
+        The index is only a cache of the per-document metadata files. If it
+        cannot be updated it is removed, so readers fall back to listing the
+        metadata files until the next update (or rebuild_index()) recreates it.
+        """
+        try:
+            for _ in range(INDEX_UPDATE_ATTEMPTS):
+                index, etag = self._read_index()
+                if etag is None:
+                    # No index yet (older session, or dropped after a failed
+                    # update): seed it from the metadata files so it is complete
+                    index = self._index_from_metadata()
+                mutate(index)
+                try:
+                    self._write_index(index, etag)
+                    return
+                except ClientError as e:
+                    if e.response['Error']['Code'] not in _INDEX_CONFLICT_CODES:
+                        raise
+            raise RuntimeError("too many concurrent index updates")
+        except Exception as e:
+            logger.warning(f"Failed to update document index for session {self.session_id}: {e}")
+            try:
+                self.s3_client.delete_object(Bucket=self.bucket_name, Key=self.index_key)
+            except Exception:
+                pass
+
+    def rebuild_index(self) -> bool:
+        """
+        Rebuild the session index from the per-document metadata files
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            index = self._index_from_metadata()
+            self.s3_client.put_object(
+                Bucket=self.bucket_name,
+                Key=self.index_key,
+                Body=orjson.dumps(index),
+                ContentType='application/json'
+            )
+            logger.info(f"Rebuilt document index for session {self.session_id} ({len(index)} documents)")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to rebuild document index: {e}")
+            return False
+
     def save_document(self, doc_id: str, content: str, doc_type: str,
                      metadata: Optional[Dict[str, Any]] = None) -> bool:
         """
@@ -56,21 +207,8 @@ class DocumentStorageManager:
             True if successful, False otherwise
         """
         try:
-            # Save markdown content
-            md_key = self._get_document_key(doc_id, "md")
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=md_key,
-                Body=content.encode('utf-8'),
-                ContentType='text/markdown',
-                Metadata={
-                    'session-id': self.session_id,
-                    'doc-type': doc_type,
-                    'created-at': datetime.utcnow().isoformat()
-                }
-            )
+            now = datetime.now(timezone.utc).isoformat()
 
-            # Save metadata
             if metadata is None:
                 metadata = {}
 
@@ -78,17 +216,42 @@ class DocumentStorageManager:
                 'doc_id': doc_id,
                 'doc_type': doc_type,
                 'session_id': self.session_id,
-                'created_at': datetime.utcnow().isoformat(),
-                'updated_at': datetime.utcnow().isoformat()
+                'created_at': now,
+                'updated_at': now,
+                'encoding': BODY_ENCODING,
+                'line_count': content.count('\n') + (0 if content.endswith('\n') else 1),
+                'section_count': content.count('##')
             })
 
+            md_key = self._get_document_key(doc_id, "md")
             metadata_key = self._get_metadata_key(doc_id)
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=metadata_key,
-                Body=json.dumps(metadata, indent=2).encode('utf-8'),
-                ContentType='application/json'
-            )
+
+            # Save markdown content and metadata concurrently
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                md_future = executor.submit(
+                    self.s3_client.put_object,
+                    Bucket=self.bucket_name,
+                    Key=md_key,
+                    Body=zstandard.compress(content.encode('utf-8'), ZSTD_LEVEL),
+                    ContentType='text/markdown',
+                    ContentEncoding='zstd',
+                    Metadata=_with_embedded_metadata({
+                        'session-id': self.session_id,
+                        'doc-type': doc_type,
+                        'created-at': now
+                    }, metadata)
+                )
+                metadata_future = executor.submit(
+                    self.s3_client.put_object,
+                    Bucket=self.bucket_name,
+                    Key=metadata_key,
+                    Body=orjson.dumps(metadata),
+                    ContentType='application/json'
+                )
+                md_future.result()
+                metadata_future.result()
+
+            self._update_index(lambda index: index.__setitem__(doc_id, metadata))
 
             logger.info(f"Saved document {doc_id} to S3: {md_key}")
             return True
@@ -114,18 +277,20 @@ class DocumentStorageManager:
                 Bucket=self.bucket_name,
                 Key=md_key
             )
-            content = response['Body'].read().decode('utf-8')
+            content = _decode_body(response)
 
-            # Load metadata
-            metadata_key = self._get_metadata_key(doc_id)
-            try:
-                metadata_response = self.s3_client.get_object(
-                    Bucket=self.bucket_name,
-                    Key=metadata_key
-                )
-                metadata = json.loads(metadata_response['Body'].read().decode('utf-8'))
-            except:
-                metadata = {}
+            # Load metadata, from the object headers when embedded
+            metadata = _embedded_metadata(response)
+            if metadata is None:
+                metadata_key = self._get_metadata_key(doc_id)
+                try:
+                    metadata_response = self.s3_client.get_object(
+                        Bucket=self.bucket_name,
+                        Key=metadata_key
+                    )
+                    metadata = orjson.loads(metadata_response['Body'].read())
+                except:
+                    metadata = {}
 
             logger.info(f"Loaded document {doc_id} from S3")
             return {
@@ -133,8 +298,11 @@ class DocumentStorageManager:
                 'metadata': metadata
             }
 
-        except self.s3_client.exceptions.NoSuchKey:
-            logger.warning(f"Document {doc_id} not found in S3")
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+                logger.warning(f"Document {doc_id} not found in S3")
+            else:
+                logger.error(f"Failed to load document {doc_id}: {e}")
             return None
         except Exception as e:
             logger.error(f"Failed to load document {doc_id}: {e}")
@@ -163,7 +331,7 @@ class DocumentStorageManager:
             metadata = existing['metadata']
             if metadata_updates:
                 metadata.update(metadata_updates)
-            metadata['updated_at'] = datetime.utcnow().isoformat()
+            metadata['updated_at'] = datetime.now(timezone.utc).isoformat()
 
             # Save updated document
             return self.save_document(
@@ -188,29 +356,27 @@ class DocumentStorageManager:
             True if successful, False otherwise
         """
         try:
-            # Delete markdown file
             md_key = self._get_document_key(doc_id, "md")
-            self.s3_client.delete_object(
+            pdf_key = self._get_document_key(doc_id, "pdf")
+            metadata_key = self._get_metadata_key(doc_id)
+
+            # Delete markdown, PDF (if any) and metadata in a single request
+            response = self.s3_client.delete_objects(
                 Bucket=self.bucket_name,
-                Key=md_key
+                Delete={
+                    'Objects': [{'Key': md_key}, {'Key': pdf_key}, {'Key': metadata_key}],
+                    'Quiet': True
+                }
             )
 
-            # Delete PDF if exists
-            pdf_key = self._get_document_key(doc_id, "pdf")
-            try:
-                self.s3_client.delete_object(
-                    Bucket=self.bucket_name,
-                    Key=pdf_key
+            # A missing PDF is fine; failing to remove the document itself is not
+            errors = [err for err in response.get('Errors', []) if err.get('Key') != pdf_key]
+            if errors:
+                raise RuntimeError(
+                    ", ".join(f"{err.get('Key')}: {err.get('Code')}" for err in errors)
                 )
-            except:
-                pass
 
-            # Delete metadata
-            metadata_key = self._get_metadata_key(doc_id)
-            self.s3_client.delete_object(
-                Bucket=self.bucket_name,
-                Key=metadata_key
-            )
+            self._update_index(lambda index: index.pop(doc_id, None))
 
             logger.info(f"Deleted document {doc_id} from S3")
             return True
@@ -219,6 +385,33 @@ class DocumentStorageManager:
             logger.error(f"Failed to delete document {doc_id}: {e}")
             return False
 
+    def _read_all_metadata(self, skip_errors: bool = True) -> List[Dict[str, Any]]:
+        """Read every per-document metadata file in the session"""
+        prefix = f"{self.session_prefix}/documents/"
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+
+        documents = []
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+            # Get only metadata files
+            for obj in page.get('Contents', []):
+                if obj['Key'].endswith('_metadata.json'):
+                    try:
+                        metadata_response = self.s3_client.get_object(
+                            Bucket=self.bucket_name,
+                            Key=obj['Key']
+                        )
+                        metadata = orjson.loads(metadata_response['Body'].read())
+                        documents.append(metadata)
+                    except Exception as e:
+                        if not skip_errors:
+                            raise
+                        logger.warning(f"Failed to load metadata from {obj['Key']}: {e}")
+        return documents
+
+    def _index_from_metadata(self) -> Dict[str, Any]:
+        """Build a complete index from the metadata files; raises if any can't be read"""
+        return {doc['doc_id']: doc for doc in self._read_all_metadata(skip_errors=False) if 'doc_id' in doc}
+
     def list_documents(self) -> List[Dict[str, Any]]:
         """
         List all documents in the current session
@@ -227,26 +420,7 @@ class DocumentStorageManager:
             List of document metadata dictionaries
         """
         try:
-            prefix = f"{self.session_prefix}/documents/"
-            response = self.s3_client.list_objects_v2(
-                Bucket=self.bucket_name,
-                Prefix=prefix
-            )
-
-            documents = []
-            if 'Contents' in response:
-                # Get only metadata files
-                for obj in response['Contents']:
-                    if obj['Key'].endswith('_metadata.json'):
-                        try:
-                            metadata_response = self.s3_client.get_object(
-                                Bucket=self.bucket_name,
-                                Key=obj['Key']
-                            )
-                            metadata = json.loads(metadata_response['Body'].read().decode('utf-8'))
-                            documents.append(metadata)
-                        except Exception as e:
-                            logger.warning(f"Failed to load metadata from {obj['Key']}: {e}")
+            documents = self._read_all_metadata()
 
             logger.info(f"Found {len(documents)} documents in session {self.session_id}")
             return documents
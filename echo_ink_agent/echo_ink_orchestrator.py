@@ -6,6 +6,7 @@ Using the "Agents as Tools" pattern with Strands Agents SDK
 import logging
 import json
 from datetime import datetime
+from functools import cache
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 
@@ -500,6 +501,26 @@ def regenerate_document(session_id: str = "latest") -> str:
         return json.dumps({"error": str(e)})
 
 
+@cache
+def _template_info_json() -> str:
+    """Build the template info payload once; TEMPLATES is static for the process"""
+    types = list_template_types()
+    templates_info = {}
+    for doc_type in types:
+        template = get_template(doc_type)
+        if template:
+            templates_info[doc_type] = {
+                "name": template.get("name", ""),
+                "required_fields": template.get("required_fields", []),
+                "optional_fields": template.get("optional_fields", [])
+            }
+
+    return json.dumps({
+        "document_types": list(templates_info.keys()),
+        "templates": templates_info
+    })
+
+
 @tool
 def get_template_info() -> str:
     """
@@ -509,21 +530,7 @@ def get_template_info() -> str:
         JSON string with template information
     """
     try:
-        types = list_template_types()
-        templates_info = {}
-        for doc_type in types:
-            template = get_template(doc_type)
-            if template:
-                templates_info[doc_type] = {
-                    "name": template.get("name", ""),
-                    "required_fields": template.get("required_fields", []),
-                    "optional_fields": template.get("optional_fields", [])
-                }
-
-        return json.dumps({
-            "document_types": list(templates_info.keys()),
-            "templates": templates_info
-        })
+        return _template_info_json()
     except Exception as e:
         logger.error(f"Error getting template info: {e}")
         return json.dumps({"error": str(e)})
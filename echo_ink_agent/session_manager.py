@@ -3,23 +3,76 @@ Session Manager for EchoInk Agent
 Handles session state persistence and retrieval
 """
 
+import asyncio
 import boto3
-import json
+import copy
+import gzip
+import orjson
 import os
-from datetime import datetime
-from typing import Optional, Dict, Any
+import time
+from functools import lru_cache
+from itertools import islice
+from typing import Optional, Dict, Any, Tuple
+from botocore.config import Config
+from botocore.exceptions import ClientError
 import logging
 
 logger = logging.getLogger(__name__)
 
 # Get AWS configuration
-ACCOUNT_ID = boto3.client('sts').get_caller_identity()['Account']
-BUCKET_NAME = f"echo-docs-{ACCOUNT_ID}"
 REGION = os.getenv("AWS_REGION", "us-west-2")
 
+# State objects are stored gzipped; level 1 is nearly free and JSON compresses well
+STATE_GZIP_LEVEL = 1
+
+# Retries when a conditional state write loses to a concurrent writer
+STATE_UPDATE_ATTEMPTS = 3
+_CONFLICT_CODES = ('PreconditionFailed', 'ConditionalRequestConflict')
+_NOT_FOUND_CODES = ('404', 'NoSuchKey', 'NotFound')
+
+# Shared S3 client (thread-safe) for all sessions
+_S3_CLIENT = boto3.client(
+    's3',
+    region_name=REGION,
+    config=Config(max_pool_connections=50, retries={'max_attempts': 3, 'mode': 'adaptive'}),
+)
+
+
+@lru_cache(maxsize=1)
+def _get_bucket_name() -> str:
+    """Resolve the document bucket name; AWS_ACCOUNT_ID avoids the STS call"""
+    account_id = os.getenv("AWS_ACCOUNT_ID") or boto3.client('sts').get_caller_identity()['Account']
+    return f"echo-docs-{account_id}"
+
+
+def _dump_state(state: Dict[str, Any]) -> bytes:
+    """Serialize session state to compact UTF-8 JSON bytes"""
+    return orjson.dumps(state)
+
+
+def _load_state(data: bytes) -> Dict[str, Any]:
+    """Parse session state from UTF-8 JSON bytes"""
+    return orjson.loads(data)
+
+
+def _migrate_documents(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert the legacy 'documents' list into the 'documents_by_id' index"""
+    documents = state.pop('documents', None)
+    if documents is not None:
+        by_id = state.setdefault('documents_by_id', {})
+        for doc in documents:
+            by_id[doc.get('id')] = doc
+    return state
+
+
+def _now_iso() -> str:
+    """Current UTC time in the naive ISO format previously produced by utcnow()"""
+    seconds, nanos = divmod(time.time_ns(), 1_000_000_000)
+    return '%04d-%02d-%02dT%02d:%02d:%02d.%06d' % (*time.gmtime(seconds)[:6], nanos // 1000)
+
 
 class SessionManager:
-    """Manages session state in S3"""
+    """Manages session state in S3 (async; S3 calls run in worker threads)"""
 
     def __init__(self, session_id: str):
         """
@@ -29,11 +82,18 @@ class SessionManager:
             session_id: Unique session identifier
         """
         self.session_id = session_id
-        self.s3_client = boto3.client('s3', region_name=REGION)
-        self.bucket_name = BUCKET_NAME
+        self.s3_client = _S3_CLIENT
+        self.bucket_name = _get_bucket_name()
         self.state_key = f"sessions/{session_id}/state.json"
+        self.current_key = f"sessions/{session_id}/current.txt"
+
+        # Write-through cache of the last state read from / written to S3,
+        # with its ETag for conditional writes
+        self._cached_state: Optional[Dict[str, Any]] = None
+        self._etag: Optional[str] = None
+        self._current_document: Optional[str] = None
 
-    def save_state(self, state: Dict[str, Any]) -> bool:
+    async def save_state(self, state: Dict[str, Any]) -> bool:
         """
         Save session state to S3
 
@@ -43,58 +103,123 @@ class SessionManager:
         Returns:
             True if successful, False otherwise
         """
+        return await self._put_state(state, conditional=False)
+
+    async def _put_state(self, state: Dict[str, Any], conditional: bool) -> bool:
+        """
+        Write session state to S3. A conditional write fails (returning False)
+        if the state changed since it was last loaded, or was created by
+        another writer when it did not exist then.
+        """
         try:
             # Add metadata
+            _migrate_documents(state)
             state['session_id'] = self.session_id
-            state['updated_at'] = datetime.utcnow().isoformat()
-
-            if 'created_at' not in state:
-                state['created_at'] = datetime.utcnow().isoformat()
-
-            # Save to S3
-            self.s3_client.put_object(
+            now = _now_iso()
+            state['updated_at'] = now
+            state.setdefault('created_at', now)
+
+            condition = {}
+            if conditional:
+                condition = {'IfMatch': self._etag} if self._etag else {'IfNoneMatch': '*'}
+            response = await asyncio.to_thread(
+                self.s3_client.put_object,
                 Bucket=self.bucket_name,
                 Key=self.state_key,
-                Body=json.dumps(state, indent=2).encode('utf-8'),
+                Body=gzip.compress(_dump_state(state), compresslevel=STATE_GZIP_LEVEL),
                 ContentType='application/json',
-                Metadata={
-                    'session-id': self.session_id,
-                    'updated-at': state['updated_at']
-                }
+                ContentEncoding='gzip',
+                **condition
             )
 
+            self._cached_state = state
+            self._etag = response.get('ETag')
+
             logger.info(f"Saved session state for {self.session_id}")
             return True
 
+        except ClientError as e:
+            self._invalidate()
+            if e.response['Error']['Code'] in _CONFLICT_CODES:
+                logger.warning(f"Session state for {self.session_id} changed concurrently; not saved")
+            else:
+                logger.error(f"Failed to save session state: {e}")
+            return False
         except Exception as e:
             logger.error(f"Failed to save session state: {e}")
             return False
 
-    def load_state(self) -> Optional[Dict[str, Any]]:
+    def _read_state(self) -> Tuple[bytes, Optional[str]]:
+        """Download and decompress the state object body, with its ETag (blocking)"""
+        response = self.s3_client.get_object(
+            Bucket=self.bucket_name,
+            Key=self.state_key
+        )
+        data = response['Body'].read()
+        # Older state objects were written uncompressed
+        if response.get('ContentEncoding') == 'gzip':
+            data = gzip.decompress(data)
+        return data, response.get('ETag')
+
+    def _invalidate(self) -> None:
+        """Drop the cached state so the next load reads S3"""
+        self._cached_state = None
+        self._etag = None
+
+    async def load_state(self, refresh: bool = False) -> Optional[Dict[str, Any]]:
         """
-        Load session state from S3
+        Load session state, from the write-through cache unless refresh is set
+
+        Args:
+            refresh: Re-read the state from S3 even if it is cached
 
         Returns:
             Session state dictionary or None if not found
         """
+        if self._cached_state is not None and not refresh:
+            return self._cached_state
+
         try:
-            response = self.s3_client.get_object(
-                Bucket=self.bucket_name,
-                Key=self.state_key
-            )
-            state = json.loads(response['Body'].read().decode('utf-8'))
+            data, etag = await asyncio.to_thread(self._read_state)
+            state = _migrate_documents(_load_state(data))
+            self._cached_state = state
+            self._etag = etag
 
             logger.info(f"Loaded session state for {self.session_id}")
             return state
 
         except self.s3_client.exceptions.NoSuchKey:
+            self._invalidate()
             logger.info(f"No existing session state for {self.session_id}")
             return None
         except Exception as e:
             logger.error(f"Failed to load session state: {e}")
             return None
 
-    def update_state(self, updates: Dict[str, Any]) -> bool:
+    async def exists(self) -> bool:
+        """
+        Check whether session state exists without downloading it
+
+        Returns:
+            True if the state object exists, False otherwise
+        """
+        if self._cached_state is not None:
+            return True
+
+        try:
+            await asyncio.to_thread(
+                self.s3_client.head_object,
+                Bucket=self.bucket_name,
+                Key=self.state_key
+            )
+            return True
+
+        except ClientError as e:
+            if e.response['Error']['Code'] in _NOT_FOUND_CODES:
+                return False
+            raise
+
+    async def update_state(self, updates: Dict[str, Any]) -> bool:
         """
         Update specific fields in session state
 
@@ -104,21 +229,28 @@ class SessionManager:
         Returns:
             True if successful, False otherwise
         """
-        try:
-            # Load existing state or create new one
-            state = self.load_state() or {}
+        return await self._apply(lambda state: state.update(updates))
 
-            # Update fields
-            state.update(updates)
-
-            # Save updated state
-            return self.save_state(state)
+    async def _apply(self, mutate) -> bool:
+        """
+        Apply a change to the session state and save it with one PUT,
+        re-reading and re-applying if a concurrent write wins the race
+        """
+        try:
+            for attempt in range(STATE_UPDATE_ATTEMPTS):
+                # Load existing state (cached after the first read) or create new one;
+                # mutate a deep copy so a failed save leaves the cached state intact
+                state = copy.deepcopy(await self.load_state(refresh=attempt > 0) or {})
+                mutate(state)
+                if await self._put_state(state, conditional=True):
+                    return True
+            return False
 
         except Exception as e:
             logger.error(f"Failed to update session state: {e}")
             return False
 
-    def delete_state(self) -> bool:
+    async def delete_state(self) -> bool:
         """
         Delete session state from S3
 
@@ -126,10 +258,16 @@ class SessionManager:
             True if successful, False otherwise
         """
         try:
-            self.s3_client.delete_object(
+            await asyncio.to_thread(
+                self.s3_client.delete_objects,
                 Bucket=self.bucket_name,
-                Key=self.state_key
+                Delete={
+                    'Objects': [{'Key': self.state_key}, {'Key': self.current_key}],
+                    'Quiet': True
+                }
             )
+            self._invalidate()
+            self._current_document = None
 
             logger.info(f"Deleted session state for {self.session_id}")
             return True
@@ -138,19 +276,40 @@ class SessionManager:
             logger.error(f"Failed to delete session state: {e}")
             return False
 
-    def get_current_document(self) -> Optional[str]:
+    async def get_current_document(self) -> Optional[str]:
         """
         Get the current document ID from session state
 
         Returns:
             Document ID or None
         """
-        state = self.load_state()
+        if self._current_document is not None:
+            return self._current_document
+
+        try:
+            response = await asyncio.to_thread(
+                self.s3_client.get_object,
+                Bucket=self.bucket_name,
+                Key=self.current_key
+            )
+            self._current_document = response['Body'].read().decode('utf-8') or None
+            return self._current_document
+
+        except ClientError as e:
+            if e.response['Error']['Code'] not in _NOT_FOUND_CODES:
+                logger.error(f"Failed to load current document: {e}")
+                return None
+        except Exception as e:
+            logger.error(f"Failed to load current document: {e}")
+            return None
+
+        # Sessions saved before current.txt existed keep it in the state
+        state = await self.load_state()
         if state:
             return state.get('current_document')
         return None
 
-    def set_current_document(self, doc_id: str) -> bool:
+    async def set_current_document(self, doc_id: str) -> bool:
         """
         Set the current document in session state
 
@@ -160,9 +319,23 @@ class SessionManager:
         Returns:
             True if successful, False otherwise
         """
-        return self.update_state({'current_document': doc_id})
+        # Stored in its own small object so no state read or rewrite is needed
+        try:
+            await asyncio.to_thread(
+                self.s3_client.put_object,
+                Bucket=self.bucket_name,
+                Key=self.current_key,
+                Body=doc_id.encode('utf-8'),
+                ContentType='text/plain'
+            )
+            self._current_document = doc_id
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to set current document: {e}")
+            return False
 
-    def add_document_to_history(self, doc_id: str, doc_type: str, title: str) -> bool:
+    async def add_document_to_history(self, doc_id: str, doc_type: str, title: str) -> bool:
         """
         Add a document to the session's document history
 
@@ -174,48 +347,51 @@ class SessionManager:
         Returns:
             True if successful, False otherwise
         """
-        try:
-            state = self.load_state() or {}
+        def add(state: Dict[str, Any]) -> None:
+            documents = state.setdefault('documents_by_id', {})
+            now = _now_iso()
 
-            if 'documents' not in state:
-                state['documents'] = []
-
-            # Check if document already exists
-            existing = [d for d in state['documents'] if d.get('id') == doc_id]
-            if existing:
+            doc = documents.get(doc_id)
+            if doc is not None:
                 # Update existing entry
-                for doc in state['documents']:
-                    if doc.get('id') == doc_id:
-                        doc['title'] = title
-                        doc['updated_at'] = datetime.utcnow().isoformat()
+                doc['title'] = title
+                doc['updated_at'] = now
             else:
                 # Add new entry
-                state['documents'].append({
+                documents[doc_id] = {
                     'id': doc_id,
                     'type': doc_type,
                     'title': title,
-                    'created_at': datetime.utcnow().isoformat()
-                })
+                    'created_at': now
+                }
 
-            return self.save_state(state)
+        try:
+            return await self._apply(add)
 
         except Exception as e:
             logger.error(f"Failed to add document to history: {e}")
             return False
 
-    def get_document_history(self) -> list:
+    async def get_document_history(self, limit: int = 50, offset: int = 0) -> list:
         """
-        Get list of all documents in session
+        Get a page of documents in session, newest first
+
+        Args:
+            limit: Maximum number of documents to return
+            offset: Number of newest documents to skip
 
         Returns:
             List of document metadata dictionaries
         """
-        state = self.load_state()
-        if state and 'documents' in state:
-            return state['documents']
-        return []
+        state = await self.load_state()
+        if not state or 'documents_by_id' not in state:
+            return []
+
+        # Documents are kept in insertion (chronological) order; walk from the end
+        newest_first = reversed(state['documents_by_id'].values())
+        return list(islice(newest_first, max(offset, 0), max(offset, 0) + max(limit, 0)))
 
-    def set_user_preferences(self, preferences: Dict[str, Any]) -> bool:
+    async def set_user_preferences(self, preferences: Dict[str, Any]) -> bool:
         """
         Save user preferences to session state
 
@@ -225,16 +401,16 @@ class SessionManager:
         Returns:
             True if successful, False otherwise
         """
-        return self.update_state({'preferences': preferences})
+        return await self.update_state({'preferences': preferences})
 
-    def get_user_preferences(self) -> Dict[str, Any]:
+    async def get_user_preferences(self) -> Dict[str, Any]:
         """
         Get user preferences from session state
 
         Returns:
             Dictionary of user preferences
         """
-        state = self.load_state()
+        state = await self.load_state()
         if state and 'preferences' in state:
             return state['preferences']
         return {}
@@ -1,24 +1,99 @@
 import os
 import logging
+import time
+from functools import lru_cache
 from bedrock_agentcore.memory import MemoryClient
 from strands import Agent
 from strands.models import BedrockModel
-from prompt import SYSTEM_PROMPT
+from prompt import SYSTEM_PROMPT, SYSTEM_PROMPT_SHA256
 from memory_tool import create_memory_tools
 from tools import get_prepare_tools
 import document_retrieval
 
 logger = logging.getLogger(__name__)
 
-# Environment configuration
-BEDROCK_MODEL_ID = os.getenv("BEDROCK_MODEL_ID", "global.anthropic.claude-sonnet-4-5-20250929-v1:0")
-MEMORY_ID = os.getenv("MEMORY_ID")
-MCP_REGION = os.getenv("MCP_REGION")
+BEDROCK_MODEL_ID_DEFAULT = "global.anthropic.claude-sonnet-4-5-20250929-v1:0"
 
-if not MEMORY_ID:
-    raise RuntimeError("Missing MEMORY_ID environment variable")
-if not MCP_REGION:
-    raise RuntimeError("Missing MCP_REGION environment variable")
+
+@lru_cache(maxsize=1)
+def _config() -> tuple[str, str, str]:
+    """Read and validate environment configuration once, on first use"""
+    model_id = os.getenv("BEDROCK_MODEL_ID", BEDROCK_MODEL_ID_DEFAULT)
+    memory_id = os.getenv("MEMORY_ID")
+    region = os.getenv("MCP_REGION")
+
+    if not memory_id:
+        raise RuntimeError("Missing MEMORY_ID environment variable")
+    if not region:
+        raise RuntimeError("Missing MCP_REGION environment variable")
+
+    return model_id, memory_id, region
+
+
+# The static system prompt followed by a Bedrock cache point, so it is not
+# re-processed on every turn
+_SYSTEM_PROMPT_CONTENT = [{"text": SYSTEM_PROMPT}, {"cachePoint": {"type": "default"}}]
+
+
+@lru_cache(maxsize=8)
+def _cached_bedrock_model(model_id: str, region: str) -> BedrockModel:
+    """Share one BedrockModel per (model_id, region) across agents"""
+    return BedrockModel(model_id=model_id, region_name=region)
+
+
+@lru_cache(maxsize=8)
+def _cached_memory_client(region: str) -> MemoryClient:
+    """Share one MemoryClient per region across agents"""
+    return MemoryClient(region_name=region)
+
+
+@lru_cache(maxsize=128)
+def _cached_tools(memory_id: str, region: str, actor_id: str, session_id: str) -> tuple:
+    """
+    Build study + memory tools once per (memory, region, actor, session).
+    The tools only close over these immutable values and the shared
+    MemoryClient, so they are safe to reuse across agent instances.
+    """
+    memory_client = _cached_memory_client(region)
+
+    # Get study tools (web search + confidence tracking)
+    study_tools = get_prepare_tools(
+        memory_id=memory_id,
+        memory_client=memory_client,
+        actor_id=actor_id,
+        session_id=session_id,
+    )
+
+    # Get memory tools
+    memory_tools = create_memory_tools(
+        memory_id=memory_id,
+        client=memory_client,
+        actor_id=actor_id,
+        session_id=session_id,
+    )
+
+    return tuple(study_tools + memory_tools)
+
+
+# Streamed text is coalesced and flushed once either threshold is reached
+STREAM_FLUSH_BYTES = 4096
+STREAM_FLUSH_INTERVAL = 0.02  # seconds
+
+# Terminal stream event, shared across responses (consumers treat it as read-only)
+_COMPLETE_EVENT = {
+    "is_task_complete": True,
+    "require_user_input": False,
+    "content": "",
+}
+
+
+def _chunk_event(content: str) -> dict:
+    """Build an in-progress stream event for a text chunk"""
+    return {
+        "is_task_complete": False,
+        "require_user_input": False,
+        "content": content,
+    }
 
 
 class EchoPrepareAgent:
@@ -32,48 +107,35 @@ class EchoPrepareAgent:
     def __init__(self, session_id: str, actor_id: str):
         self.session_id = session_id
         self.actor_id = actor_id
+        model_id, memory_id, region = _config()
 
         # Initialize Bedrock Claude model
-        bedrock_model = BedrockModel(
-            model_id=BEDROCK_MODEL_ID,
-            region_name=MCP_REGION
-        )
-
-        # Initialize memory client
-        memory_client = MemoryClient(region_name=MCP_REGION)
+        bedrock_model = _cached_bedrock_model(model_id, region)
 
         # Initialize S3 document retrieval with session ID
         document_retrieval.set_session_id(session_id)
 
-        # Get memory tools
-        memory_tools = create_memory_tools(
-            memory_id=MEMORY_ID,
-            client=memory_client,
-            actor_id=actor_id,
-            session_id=session_id,
-        )
-
-        # Get study tools (web search + confidence tracking)
-        study_tools = get_prepare_tools(
-            memory_id=MEMORY_ID,
-            memory_client=memory_client,
-            actor_id=actor_id,
-            session_id=session_id,
-        )
+        # Get study + memory tools (shared across agents for the same session)
+        session_tools = _cached_tools(memory_id, region, actor_id, session_id)
 
         # Get document retrieval tools (read-only access to instructor materials)
         retrieval_tools = document_retrieval.get_document_retrieval_tools()
 
         # Combine all tools
-        all_tools = study_tools + memory_tools + retrieval_tools
+        all_tools = list(session_tools) + retrieval_tools
 
-        logger.info(f"Initializing Echo Prepare Agent with {len(all_tools)} tools (including {len(retrieval_tools)} document retrieval tools)")
+        logger.info(
+            "Initializing Echo Prepare Agent with %d tools (including %d document retrieval tools), system prompt %s",
+            len(all_tools),
+            len(retrieval_tools),
+            SYSTEM_PROMPT_SHA256[:12],
+        )
 
         # Create Strands agent
         self.agent = Agent(
             name="Echo Prepare Agent",
             description="Student study and exam preparation assistant that helps with research, practice questions, and study planning",
-            system_prompt=SYSTEM_PROMPT,
+            system_prompt=_SYSTEM_PROMPT_CONTENT,
             model=bedrock_model,
             tools=all_tools,
         )
@@ -81,50 +143,62 @@ class EchoPrepareAgent:
         logger.info("Echo Prepare Agent initialized successfully")
 
     async def stream(self, query: str, session_id: str):
-        """Stream agent responses"""
-        response = str()
+        """Stream agent responses, batching small text chunks"""
+        had_output = False
+        buffer = []
+        buffer_len = 0
+        last_flush = time.monotonic()
         try:
             async for event in self.agent.stream_async(query):
                 if "data" in event:
-                    # Stream text chunks to the client
+                    # Buffer text chunks and flush them to the client in batches
                     chunk = event["data"]
-                    response += chunk
-                    yield {
-                        "is_task_complete": False,
-                        "require_user_input": False,
-                        "content": chunk,
-                    }
+                    had_output = True
+                    buffer.append(chunk)
+                    buffer_len += len(chunk)
+                    now = time.monotonic()
+                    if buffer_len >= STREAM_FLUSH_BYTES or now - last_flush >= STREAM_FLUSH_INTERVAL:
+                        yield _chunk_event("".join(buffer))
+                        buffer.clear()
+                        buffer_len = 0
+                        last_flush = now
+                elif "current_tool_use" in event and buffer:
+                    # Don't hold text back while a tool runs
+                    yield _chunk_event("".join(buffer))
+                    buffer.clear()
+                    buffer_len = 0
+                    last_flush = time.monotonic()
                 elif "complete" in event:
                     # Final completion event
-                    yield {
-                        "is_task_complete": True,
-                        "require_user_input": False,
-                        "content": "",
-                    }
+                    if buffer:
+                        yield _chunk_event("".join(buffer))
+                        buffer.clear()
+                    yield _COMPLETE_EVENT
                     break
 
         except Exception as e:
-            logger.error(f"Error during agent streaming: {e}", exc_info=True)
+            logger.error("Error during agent streaming: %s", e, exc_info=True)
+            if buffer:
+                yield _chunk_event("".join(buffer))
+                buffer.clear()
             yield {
                 "is_task_complete": False,
                 "require_user_input": True,
                 "content": f"Error processing request: {e}",
             }
         finally:
-            # Send completion if we have content
-            if response:
-                yield {
-                    "is_task_complete": True,
-                    "require_user_input": False,
-                    "content": "",
-                }
+            # Send any remaining text, then completion if we have content
+            if buffer:
+                yield _chunk_event("".join(buffer))
+            if had_output:
+                yield _COMPLETE_EVENT
 
     def invoke(self, query: str, session_id: str):
         """Invoke agent synchronously"""
         try:
             return str(self.agent(query))
         except Exception as e:
-            logger.error(f"Error invoking agent: {e}", exc_info=True)
+            logger.error("Error invoking agent: %s", e, exc_info=True)
             raise Exception(f"Error invoking agent: {e}")
 
 
@@ -2,92 +2,281 @@
 Document Retrieval Tools for EchoPrepare Agent
 Read-only access to instructor-created study materials from S3
 """
+import asyncio
+import base64
 import boto3
-import json
+import codecs
+import orjson
 import os
 import logging
-from typing import Optional, Dict, Any, List
+import re
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from threading import Lock
+from typing import Optional, Dict, Any, List, Set, Tuple
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from cachetools import TTLCache
 from strands import tool
+import zstandard
 
 logger = logging.getLogger(__name__)
 
 # Get AWS configuration
-ACCOUNT_ID = boto3.client('sts').get_caller_identity()['Account']
-BUCKET_NAME = f"echo-docs-{ACCOUNT_ID}"
 REGION = os.getenv("AWS_REGION", "us-west-2")
 
+# Parallel S3 reads when listing documents; ~16 concurrent GETs saturates S3
+METADATA_FETCH_WORKERS = 16
+
+# Shared S3 client (thread-safe); keeps the HTTPS keep-alive pool across sessions
+_S3 = boto3.client(
+    's3',
+    region_name=REGION,
+    config=Config(max_pool_connections=32, retries={'max_attempts': 3, 'mode': 'adaptive'}),
+)
+
+
+@lru_cache(maxsize=1)
+def _fetch_account_id() -> str:
+    """Look up the AWS account ID via STS, once per process"""
+    return boto3.client('sts').get_caller_identity()['Account']
+
+
+@lru_cache(maxsize=1)
+def _get_bucket_name() -> str:
+    """Resolve the document bucket name; AWS_ACCOUNT_ID avoids the STS call"""
+    account_id = os.getenv("AWS_ACCOUNT_ID") or _fetch_account_id()
+    return f"echo-docs-{account_id}"
+
+
+# In-process caches: documents keyed by (session_id, doc_id), listings by session_id
+_DOC_CACHE = TTLCache(maxsize=128, ttl=60)
+_LIST_CACHE = TTLCache(maxsize=16, ttl=10)
+_SEARCH_CACHE = TTLCache(maxsize=16, ttl=10)
+_CACHE_LOCK = Lock()
+
+_TOKEN_RE = re.compile(r'\w+')
+
+# Markdown bodies are read and decoded in chunks of this size
+BODY_CHUNK_SIZE = 64 * 1024
+
+# Emoji shown next to each document type in listings
+_EMOJI = {"quiz": "📝", "test": "📄"}
+_DEFAULT_EMOJI = "📋"
+
+# Error codes S3 returns for a missing key (GET reports NoSuchKey, HEAD a bare 404)
+_NOT_FOUND_CODES = ('NoSuchKey', '404')
+
 # Global session_id - will be set when agent is initialized
 _current_session_id: Optional[str] = None
-_s3_client = None
 
 
 def set_session_id(session_id: str):
     """Set the current session ID for document retrieval"""
-    global _current_session_id, _s3_client
+    global _current_session_id
+    # The caches are keyed by session, so entries for other sessions stay valid
     _current_session_id = session_id
-    _s3_client = boto3.client('s3', region_name=REGION)
     logger.info(f"Document retrieval session ID set to: {session_id}")
 
 
-def _load_document(doc_id: str) -> Optional[Dict[str, Any]]:
-    """Load a document from S3 (internal helper)"""
-    if not _current_session_id or not _s3_client:
+def _load_document(doc_id: str, load_content: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Load a document, served from the in-process cache when fresh (internal helper).
+    With load_content=False, 'content' may be None when the metadata alone
+    (read from the object headers) carries line/section counts.
+    """
+    if not _current_session_id:
         raise ValueError("Session ID not set. Call set_session_id() first.")
 
+    cache_key = (_current_session_id, doc_id)
+    with _CACHE_LOCK:
+        doc_data = _DOC_CACHE.get(cache_key)
+    if doc_data is not None:
+        return doc_data
+
+    if not load_content:
+        try:
+            metadata = _fetch_header_metadata(doc_id)
+        except ClientError as e:
+            if e.response['Error']['Code'] in _NOT_FOUND_CODES:
+                return None
+            metadata = None
+        if metadata is not None and 'line_count' in metadata:
+            return {'content': None, 'metadata': metadata}
+
+    doc_data = _fetch_document(doc_id)
+    if doc_data is not None:
+        with _CACHE_LOCK:
+            _DOC_CACHE[cache_key] = doc_data
+    return doc_data
+
+
+def _fetch_document(doc_id: str) -> Optional[Dict[str, Any]]:
+    """Load a document from S3"""
     try:
         session_prefix = f"sessions/{_current_session_id}"
         md_key = f"{session_prefix}/documents/{doc_id}.md"
+        metadata_key = f"{session_prefix}/documents/{doc_id}_metadata.json"
 
-        # Load markdown content
-        response = _s3_client.get_object(Bucket=BUCKET_NAME, Key=md_key)
-        content = response['Body'].read().decode('utf-8')
+        # Load markdown content; metadata is usually embedded in its headers
+        response = _S3.get_object(Bucket=_get_bucket_name(), Key=md_key)
+        content = _read_markdown(response)
 
-        # Load metadata
-        metadata_key = f"{session_prefix}/documents/{doc_id}_metadata.json"
-        try:
-            metadata_response = _s3_client.get_object(Bucket=BUCKET_NAME, Key=metadata_key)
-            metadata = json.loads(metadata_response['Body'].read().decode('utf-8'))
-        except:
-            metadata = {}
+        encoded = response.get('Metadata', {}).get('meta-json')
+        if encoded:
+            metadata = orjson.loads(base64.b64decode(encoded))
+        else:
+            # Oversized or legacy metadata lives in a sidecar file
+            metadata = _fetch_metadata(metadata_key) or {}
 
         return {'content': content, 'metadata': metadata}
-    except _s3_client.exceptions.NoSuchKey:
+    except ClientError as e:
+        if e.response['Error']['Code'] in _NOT_FOUND_CODES:
+            return None
+        logger.error(f"Error loading document {doc_id}: {e}")
         return None
     except Exception as e:
         logger.error(f"Error loading document {doc_id}: {e}")
         return None
 
 
+def _read_markdown(response: Dict[str, Any]) -> str:
+    """
+    Decode a markdown body chunk by chunk, decompressing zstd bodies on the fly,
+    so the full raw bytes are never held alongside the decoded text.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    decompressor = None
+    if response.get('ContentEncoding') == 'zstd':
+        decompressor = zstandard.ZstdDecompressor().decompressobj()
+
+    parts = []
+    for chunk in response['Body'].iter_chunks(BODY_CHUNK_SIZE):
+        if decompressor is not None:
+            chunk = decompressor.decompress(chunk)
+        parts.append(decoder.decode(chunk))
+    parts.append(decoder.decode(b'', final=True))
+    return ''.join(parts)
+
+
+def _fetch_header_metadata(doc_id: str) -> Optional[Dict[str, Any]]:
+    """Read metadata embedded in the markdown object's headers, without its body"""
+    md_key = f"sessions/{_current_session_id}/documents/{doc_id}.md"
+    response = _S3.head_object(Bucket=_get_bucket_name(), Key=md_key)
+    encoded = response.get('Metadata', {}).get('meta-json')
+    return orjson.loads(base64.b64decode(encoded)) if encoded else None
+
+
+def _fetch_metadata(key: str) -> Optional[Dict[str, Any]]:
+    """Fetch and parse a single metadata file, or None if it can't be read"""
+    try:
+        metadata_response = _S3.get_object(Bucket=_get_bucket_name(), Key=key)
+        return orjson.loads(metadata_response['Body'].read())
+    except Exception as e:
+        logger.warning(f"Failed to load metadata from {key}: {e}")
+        return None
+
+
+def _load_index(session_prefix: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    Load the session's document index written by EchoInk's storage manager.
+    Returns None if the session has no index yet.
+    """
+    try:
+        response = _S3.get_object(Bucket=_get_bucket_name(), Key=f"{session_prefix}/documents/_index.json")
+    except ClientError as e:
+        if e.response['Error']['Code'] in _NOT_FOUND_CODES:
+            return None
+        raise
+    return list(orjson.loads(response['Body'].read()).values())
+
+
 def _list_documents() -> List[Dict[str, Any]]:
-    """List all documents in the current session (internal helper)"""
-    if not _current_session_id or not _s3_client:
+    """List all documents in the current session, briefly cached (internal helper)"""
+    if not _current_session_id:
         raise ValueError("Session ID not set. Call set_session_id() first.")
 
+    session_id = _current_session_id
+    with _CACHE_LOCK:
+        documents = _LIST_CACHE.get(session_id)
+    if documents is not None:
+        return documents
+
+    documents = _fetch_document_list()
+    if documents:
+        with _CACHE_LOCK:
+            _LIST_CACHE[session_id] = documents
+    return documents
+
+
+def _fetch_document_list() -> List[Dict[str, Any]]:
+    """List all documents in the current session from S3"""
     try:
         session_prefix = f"sessions/{_current_session_id}"
-        prefix = f"{session_prefix}/documents/"
-
-        response = _s3_client.list_objects_v2(Bucket=BUCKET_NAME, Prefix=prefix)
 
-        documents = []
-        if 'Contents' in response:
-            for obj in response['Contents']:
-                if obj['Key'].endswith('_metadata.json'):
-                    try:
-                        metadata_response = _s3_client.get_object(Bucket=BUCKET_NAME, Key=obj['Key'])
-                        metadata = json.loads(metadata_response['Body'].read().decode('utf-8'))
-                        documents.append(metadata)
-                    except Exception as e:
-                        logger.warning(f"Failed to load metadata from {obj['Key']}: {e}")
+        # Fast path: a single GET of the session index
+        documents = _load_index(session_prefix)
+        if documents is not None:
+            return documents
 
-        return documents
+        # No index yet: list and fetch the per-document metadata files
+        prefix = f"{session_prefix}/documents/"
+        paginator = _S3.get_paginator('list_objects_v2')
+        keys = [
+            obj['Key']
+            for page in paginator.paginate(Bucket=_get_bucket_name(), Prefix=prefix)
+            for obj in page.get('Contents', [])
+            if obj['Key'].endswith('_metadata.json')
+        ]
+        if not keys:
+            return []
+
+        # Fetch metadata files concurrently over the shared (thread-safe) client
+        with ThreadPoolExecutor(max_workers=min(METADATA_FETCH_WORKERS, len(keys))) as executor:
+            results = executor.map(_fetch_metadata, keys)
+            return [metadata for metadata in results if metadata is not None]
     except Exception as e:
         logger.error(f"Error listing documents: {e}")
         return []
 
 
+def _tokenize(text: str) -> Set[str]:
+    """Split text into casefolded word tokens"""
+    return set(_TOKEN_RE.findall(text.casefold()))
+
+
+def _get_search_index() -> Tuple[List[Dict[str, Any]], Dict[str, Set[int]], List[str]]:
+    """
+    Get the session's documents with an inverted index over doc_id, title and
+    doc_type (token -> positions in the document list), plus one casefolded
+    blob per document, its fields NUL-separated, for substring matching.
+    Rebuilt only when the underlying listing changes.
+    """
+    documents = _list_documents()
+    session_id = _current_session_id
+
+    with _CACHE_LOCK:
+        entry = _SEARCH_CACHE.get(session_id)
+    if entry is not None and entry[0] is documents:
+        return entry
+
+    postings = defaultdict(set)
+    blobs = []
+    for position, doc in enumerate(documents):
+        blob = f"{doc.get('doc_id', '')}\0{doc.get('title', '')}\0{doc.get('doc_type', '')}".casefold()
+        blobs.append(blob)
+        for token in _TOKEN_RE.findall(blob):
+            postings[token].add(position)
+
+    entry = (documents, dict(postings), blobs)
+    with _CACHE_LOCK:
+        _SEARCH_CACHE[session_id] = entry
+    return entry
+
+
 @tool
-def list_study_materials(doc_type: Optional[str] = None) -> str:
+async def list_study_materials(doc_type: Optional[str] = None) -> str:
     """
     List all available study materials (quizzes, tests, syllabi, lesson plans).
     Students can see all materials created by instructors in their course.
@@ -104,7 +293,7 @@ def list_study_materials(doc_type: Optional[str] = None) -> str:
         list_study_materials() - Show all materials
     """
     try:
-        documents = _list_documents()
+        documents = await asyncio.to_thread(_list_documents)
 
         if not documents:
             return "📚 No study materials available yet. Check back after your instructor creates course content!"
@@ -126,7 +315,7 @@ def list_study_materials(doc_type: Optional[str] = None) -> str:
                 by_type[dtype] = []
             by_type[dtype].append(doc)
 
-        # Display grouped by type
+        # Display grouped by type, with an emoji based on type
         for dtype, docs in sorted(by_type.items()):
             doc_list.append(f"\n**{dtype.upper()}:**")
             for i, doc in enumerate(docs, 1):
@@ -134,8 +323,7 @@ def list_study_materials(doc_type: Optional[str] = None) -> str:
                 title = doc.get('title', doc_id)
                 created = doc.get('created_at', 'unknown')
 
-                # Emoji based on type
-                emoji = "📝" if dtype == "quiz" else "📄" if dtype == "test" else "📋"
+                emoji = _EMOJI.get(dtype, _DEFAULT_EMOJI)
                 doc_list.append(f"  {emoji} {i}. **{title}** (ID: `{doc_id}`) - created {created[:10]}")
 
         doc_list.append(f"\n💡 **Tip:** Use `view_study_material('doc_id')` to read the full content!")
@@ -148,7 +336,7 @@ def list_study_materials(doc_type: Optional[str] = None) -> str:
 
 
 @tool
-def view_study_material(doc_id: str) -> str:
+async def view_study_material(doc_id: str) -> str:
     """
     View the full content of a study material (quiz, test, syllabus, etc.).
     This gives you the complete document to study from.
@@ -164,7 +352,7 @@ def view_study_material(doc_id: str) -> str:
         view_study_material("quiz_CSE401") - Read the CSE401 quiz
     """
     try:
-        doc_data = _load_document(doc_id)
+        doc_data = await asyncio.to_thread(_load_document, doc_id)
 
         if not doc_data:
             return f"❌ Document '{doc_id}' not found. Use `list_study_materials()` to see available materials."
@@ -188,7 +376,7 @@ def view_study_material(doc_id: str) -> str:
 
 
 @tool
-def search_study_materials(query: str) -> str:
+async def search_study_materials(query: str) -> str:
     """
     Search study materials by keyword (searches titles and content).
     Helpful for finding specific topics or subjects across all materials.
@@ -203,25 +391,20 @@ def search_study_materials(query: str) -> str:
         search_study_materials("photosynthesis") - Find all materials about photosynthesis
     """
     try:
-        documents = _list_documents()
+        documents, postings, blobs = await asyncio.to_thread(_get_search_index)
 
         if not documents:
             return "📚 No study materials available to search."
 
-        query_lower = query.lower()
-        matches = []
-
-        # Search in titles and metadata
-        for doc in documents:
-            doc_id = doc.get('doc_id', '')
-            title = doc.get('title', '')
-            doc_type = doc.get('doc_type', '')
+        # Substring matches within a field, partial words included
+        query_folded = query.casefold()
+        positions = {position for position, blob in enumerate(blobs) if query_folded in blob}
 
-            # Check if query matches
-            if (query_lower in doc_id.lower() or
-                query_lower in title.lower() or
-                query_lower in doc_type.lower()):
-                matches.append(doc)
+        # Plus documents containing every query word, in any order or field
+        query_tokens = _tokenize(query)
+        if query_tokens:
+            positions |= set.intersection(*(postings.get(token, set()) for token in query_tokens))
+        matches = [documents[position] for position in sorted(positions)]
 
         if not matches:
             return f"🔍 No materials found matching '{query}'. Try different keywords or use `list_study_materials()` to see all materials."
@@ -234,7 +417,7 @@ def search_study_materials(query: str) -> str:
             title = doc.get('title', doc_id)
             doc_type = doc.get('doc_type', 'other')
 
-            emoji = "📝" if doc_type == "quiz" else "📄" if doc_type == "test" else "📋"
+            emoji = _EMOJI.get(doc_type, _DEFAULT_EMOJI)
             result.append(f"{emoji} {i}. **{title}** ({doc_type}) - ID: `{doc_id}`")
 
         result.append(f"\n💡 Use `view_study_material('doc_id')` to read the full content!")
@@ -248,7 +431,7 @@ def search_study_materials(query: str) -> str:
 
 
 @tool
-def get_material_summary(doc_id: str) -> str:
+async def get_material_summary(doc_id: str) -> str:
     """
     Get a quick summary of a study material without viewing the full content.
     Shows key info like type, topics covered, and when it was created.
@@ -263,7 +446,7 @@ def get_material_summary(doc_id: str) -> str:
         get_material_summary("quiz_CSE401") - Get quick info about the quiz
     """
     try:
-        doc_data = _load_document(doc_id)
+        doc_data = await asyncio.to_thread(_load_document, doc_id, load_content=False)
 
         if not doc_data:
             return f"❌ Document '{doc_id}' not found."
@@ -277,8 +460,12 @@ def get_material_summary(doc_id: str) -> str:
         updated = metadata.get('updated_at', 'N/A')[:10]
 
         # Count questions/sections (rough estimate)
-        num_lines = len(content.split('\n'))
-        num_sections = content.count('##')
+        if content is None:
+            num_lines = metadata['line_count']
+            num_sections = metadata.get('section_count', 0)
+        else:
+            num_lines = content.count('\n') + (0 if content.endswith('\n') else 1)
+            num_sections = content.count('##')
 
         summary = f"📋 **Summary: {doc_id}**\n\n"
         summary += f"**Type:** {doc_type.title()}\n"
@@ -8,6 +8,7 @@ from pathlib import Path
 from starlette.responses import JSONResponse
 import logging
 import os
+import tools
 import uvicorn
 
 
@@ -85,6 +86,10 @@ async def ping(request):
     return JSONResponse({"status": "healthy"})
 
 
+# Send queued confidence updates to memory before the server exits
+app.add_event_handler("shutdown", tools.flush)
+
+
 logger.info("✅ A2A Server configured")
 logger.info(f"📍 Server URL: {runtime_url}")
 logger.info(f"🏥 Health check: {runtime_url}/health")
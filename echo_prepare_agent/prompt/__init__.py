@@ -1,3 +1,5 @@
+import hashlib
+
 SYSTEM_PROMPT = """You are Echo-Prepare, a student study and exam preparation assistant helping students master coursework and prepare for assessments.
 
 **Available Utility Tools:**
@@ -10,6 +12,7 @@ SYSTEM_PROMPT = """You are Echo-Prepare, a student study and exam preparation as
 
 **Study & Research Tools:**
 - `search_study_resources`: Search web for educational content, tutorials, and study materials (Tavily API)
+- `search_and_recall`: Search the web and recall the student's tracked progress on a topic in one call
 - `track_topic_confidence`: Save and track student confidence levels (1-10 scale) to memory
 
 **Your Workflow for Student Requests:**
@@ -69,3 +72,6 @@ You have access to memory tools to leverage past study sessions and learning con
 - Combine historical learning insights with current search results for comprehensive study support
 
 Be encouraging, clear, and focused on helping students succeed in their learning goals."""
+
+# Fingerprint of the static prompt, for logging and deduplication
+SYSTEM_PROMPT_SHA256 = hashlib.sha256(SYSTEM_PROMPT.encode()).hexdigest()
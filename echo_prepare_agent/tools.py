@@ -1,7 +1,9 @@
 from strands import tool
+import asyncio
 import os
 import logging
 from datetime import datetime
+from cachetools import TTLCache
 from tavily import TavilyClient
 from bedrock_agentcore.memory import MemoryClient
 
@@ -15,11 +17,122 @@ TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
 if not TAVILY_API_KEY:
     raise RuntimeError("Missing TAVILY_API_KEY environment variable")
 
+# Confidence status and suggestion template, indexed by level (index 0 unused)
+_NEEDS_WORK = ("Needs Work", "{topic} needs more attention. Consider watching tutorials or asking for help.")
+_LEARNING = ("Learning", "Keep studying {topic}. Try different resources or practice problems.")
+_COMFORTABLE = ("Comfortable", "You're doing well with {topic}. Practice a few more problems to solidify understanding.")
+_MASTERED = ("Mastered", "Great work on {topic}! Keep reviewing occasionally to maintain mastery.")
+_STATUS_BY_LEVEL = (
+    (_NEEDS_WORK,) * 4 + (_LEARNING,) * 2 + (_COMFORTABLE,) * 2 + (_MASTERED,) * 3
+)
+
+# Recent web searches keyed on (normalized query, max_results, time_range)
+_TAVILY_CACHE = TTLCache(maxsize=256, ttl=600)
+
+# Confidence writes are queued and sent to memory in batches by a background task
+MEMORY_FLUSH_BATCH = 32
+MEMORY_FLUSH_INTERVAL = 0.25  # seconds
+
+_MEMORY_QUEUE: asyncio.Queue | None = None
+_flush_task: asyncio.Task | None = None
+# Queued by flush() to make the flush task send what it holds and exit
+_STOP = object()
+
+
+async def _save_one(memory_client: MemoryClient, memory_id: str, actor_id: str, session_id: str, content: str) -> bool:
+    """Save one confidence update as a memory event; failures are logged, not raised"""
+    try:
+        # Recorded as a statement about the student so long-term memory
+        # strategies extract it into the confidence-tracking namespace
+        await asyncio.to_thread(
+            memory_client.create_event,
+            memory_id=memory_id,
+            actor_id=actor_id,
+            session_id=session_id,
+            messages=[(content, "USER")],
+        )
+        return True
+    except Exception as e:
+        logger.warning(f"Failed to save to memory: {e}")
+        return False
+
+
+async def _save_batch(batch: list) -> None:
+    """Send a batch of queued memory writes concurrently"""
+    saved = await asyncio.gather(*(_save_one(*item) for item in batch))
+    logger.info(f"Flushed {sum(saved)}/{len(batch)} confidence updates to memory")
+
+
+def _drain(limit: int) -> list:
+    """Take up to limit queued writes without waiting"""
+    batch = []
+    while len(batch) < limit and not _MEMORY_QUEUE.empty():
+        batch.append(_MEMORY_QUEUE.get_nowait())
+    return batch
+
+
+async def _flush_loop() -> None:
+    """Wait for queued writes and flush them in batches, until _STOP is queued"""
+    while True:
+        batch = [await _MEMORY_QUEUE.get()]
+        if batch[0] is not _STOP:
+            # Give concurrent tool calls a moment to add to the same batch
+            await asyncio.sleep(MEMORY_FLUSH_INTERVAL)
+            batch += _drain(MEMORY_FLUSH_BATCH - 1)
+        stop = any(item is _STOP for item in batch)
+        batch = [item for item in batch if item is not _STOP]
+        if batch:
+            try:
+                await _save_batch(batch)
+            except Exception as e:
+                # Keep the loop alive for later writes
+                logger.error(f"Failed to flush confidence updates: {e}", exc_info=True)
+        if stop:
+            return
+
+
+async def _enqueue_memory_write(*item) -> None:
+    """Queue a memory write, starting the flush task on first use"""
+    global _MEMORY_QUEUE, _flush_task
+    if _MEMORY_QUEUE is None:
+        _MEMORY_QUEUE = asyncio.Queue()
+    if _flush_task is None or _flush_task.done():
+        _flush_task = asyncio.create_task(_flush_loop())
+    await _MEMORY_QUEUE.put(item)
+
+
+async def flush() -> None:
+    """Send all queued and in-flight memory writes, then stop the flush task (call on shutdown)"""
+    global _flush_task
+    try:
+        if _flush_task is not None and not _flush_task.done():
+            # Let the task finish the batch it already holds rather than cancel it
+            await _MEMORY_QUEUE.put(_STOP)
+            await _flush_task
+        _flush_task = None
+        if _MEMORY_QUEUE is not None:
+            while batch := _drain(MEMORY_FLUSH_BATCH):
+                await _save_batch(batch)
+    except Exception as e:
+        logger.error(f"Failed to flush confidence updates on shutdown: {e}", exc_info=True)
+
+
+def _to_result(item: dict) -> dict:
+    """Normalize one Tavily search hit"""
+    get = item.get
+    return {
+        "title": get("title"),
+        "url": get("url"),
+        "snippet": get("content") or get("snippet"),
+        "score": get("score"),
+    }
+
 
 def get_prepare_tools(memory_id: str, memory_client: MemoryClient, actor_id: str, session_id: str):
     """
     Get Echo Prepare utility tools:
     - search_study_resources: Web search for educational content (Tavily API)
+    - search_and_recall: Web search and confidence-memory recall, run concurrently
     - track_topic_confidence: Save/retrieve student confidence levels (Memory-backed)
 
     Note: The agent generates practice questions and study notes directly using its LLM,
@@ -28,6 +141,59 @@ def get_prepare_tools(memory_id: str, memory_client: MemoryClient, actor_id: str
 
     # Initialize Tavily client for web search
     tavily_client = TavilyClient(api_key=TAVILY_API_KEY)
+    confidence_namespace = f"/confidence-tracking/{actor_id}"
+
+    async def run_search(query: str, top_k: int, recency_days: int | None) -> list:
+        """Run a Tavily search off the event loop, serving repeats from cache"""
+        search_kwargs = {
+            "query": query,
+            "max_results": max(1, min(top_k, 10)),
+            "include_domains": None,
+            "exclude_domains": None,
+        }
+
+        if recency_days:
+            # Tavily expects: 'day', 'week', 'month', 'year'
+            if recency_days <= 1:
+                search_kwargs["time_range"] = "day"
+            elif recency_days <= 7:
+                search_kwargs["time_range"] = "week"
+            elif recency_days <= 30:
+                search_kwargs["time_range"] = "month"
+            else:
+                search_kwargs["time_range"] = "year"
+
+        # Repeated searches within the TTL are served from cache
+        cache_key = (
+            " ".join(query.lower().split()),
+            search_kwargs["max_results"],
+            search_kwargs.get("time_range"),
+        )
+        results = _TAVILY_CACHE.get(cache_key)
+        if results is None:
+            res = await asyncio.to_thread(tavily_client.search, **search_kwargs)
+            results = [_to_result(item) for item in res.get("results", ())]
+            _TAVILY_CACHE[cache_key] = results
+        return results
+
+    async def recall_confidence(query: str, top_k: int) -> list:
+        """Retrieve the student's tracked confidence notes related to a query"""
+        memories = await asyncio.to_thread(
+            memory_client.retrieve_memories,
+            memory_id=memory_id,
+            namespace=confidence_namespace,
+            query=query,
+            top_k=top_k,
+        )
+        texts = []
+        for memory in memories:
+            if isinstance(memory, dict):
+                content = memory.get("content", {})
+                if isinstance(content, dict):
+                    text = content.get("text", "").strip()
+                    if text:
+                        texts.append(text)
+        return texts
 
     @tool
     async def search_study_resources(
@@ -51,35 +217,7 @@ def get_prepare_tools(memory_id: str, memory_client: MemoryClient, actor_id: str
             search_study_resources("explain quantum entanglement simply", top_k=3)
         """
         try:
-            search_kwargs = {
-                "query": query,
-                "max_results": max(1, min(top_k, 10)),
-                "include_domains": None,
-                "exclude_domains": None,
-            }
-
-            if recency_days:
-                # Tavily expects: 'day', 'week', 'month', 'year'
-                if recency_days <= 1:
-                    search_kwargs["time_range"] = "day"
-                elif recency_days <= 7:
-                    search_kwargs["time_range"] = "week"
-                elif recency_days <= 30:
-                    search_kwargs["time_range"] = "month"
-                else:
-                    search_kwargs["time_range"] = "year"
-
-            res = tavily_client.search(**search_kwargs)
-            results = []
-            for item in res.get("results", []):
-                results.append(
-                    {
-                        "title": item.get("title"),
-                        "url": item.get("url"),
-                        "snippet": item.get("content") or item.get("snippet"),
-                        "score": item.get("score"),
-                    }
-                )
+            results = await run_search(query, top_k, recency_days)
 
             logger.info(f"Found {len(results)} results for query: {query}")
             return {"results": results, "provider": "tavily", "query": query}
@@ -88,6 +226,47 @@ def get_prepare_tools(memory_id: str, memory_client: MemoryClient, actor_id: str
             logger.error(f"Error searching for study resources: {e}")
             return {"error": str(e), "results": []}
 
+    @tool
+    async def search_and_recall(query: str, top_k: int = 5) -> dict:
+        """
+        Search the web for study resources and recall the student's tracked progress
+        on the topic at the same time. Use this instead of calling a web search and a
+        memory lookup one after the other.
+
+        Args:
+            query: The topic or question to research (e.g., "Python recursion")
+            top_k: Number of web results and memories to return (1-10, default: 5)
+
+        Returns:
+            Dictionary with web "search" results and recalled "memory" notes
+
+        Example:
+            search_and_recall("photosynthesis light reactions", top_k=3)
+        """
+        search, memory = await asyncio.gather(
+            run_search(query, top_k, None),
+            recall_confidence(query, max(1, min(top_k, 10))),
+            return_exceptions=True,
+        )
+
+        result = {"query": query, "provider": "tavily", "search": [], "memory": []}
+        if isinstance(search, Exception):
+            logger.error(f"Error searching for study resources: {search}")
+            result["search_error"] = str(search)
+        else:
+            result["search"] = search
+        if isinstance(memory, Exception):
+            logger.warning(f"Failed to recall from memory: {memory}")
+            result["memory_error"] = str(memory)
+        else:
+            result["memory"] = memory
+
+        logger.info(
+            f"search_and_recall found {len(result['search'])} results and "
+            f"{len(result['memory'])} memories for query: {query}"
+        )
+        return result
+
     @tool
     async def track_topic_confidence(
         topic: str,
@@ -114,35 +293,22 @@ def get_prepare_tools(memory_id: str, memory_client: MemoryClient, actor_id: str
             timestamp = datetime.utcnow().isoformat()
 
             # Determine status and suggestions
-            if confidence_level >= 8:
-                status = "Mastered"
-                suggestion = f"Great work on {topic}! Keep reviewing occasionally to maintain mastery."
-            elif confidence_level >= 6:
-                status = "Comfortable"
-                suggestion = f"You're doing well with {topic}. Practice a few more problems to solidify understanding."
-            elif confidence_level >= 4:
-                status = "Learning"
-                suggestion = f"Keep studying {topic}. Try different resources or practice problems."
-            else:
-                status = "Needs Work"
-                suggestion = f"{topic} needs more attention. Consider watching tutorials or asking for help."
+            status, template = _STATUS_BY_LEVEL[confidence_level]
+            suggestion = template.format(topic=topic)
 
             # Save to memory for progress tracking
             memory_content = f"Topic: {topic} | Confidence: {confidence_level}/10 | Status: {status}"
             if notes:
                 memory_content += f" | Notes: {notes}"
 
-            try:
-                await memory_client.save_to_memory(
-                    memory_id=memory_id,
-                    actor_id=actor_id,
-                    session_id=session_id,
-                    content=memory_content,
-                    namespace=f"/confidence-tracking/{actor_id}"
-                )
-                logger.info(f"Saved confidence tracking to memory: {topic} = {confidence_level}/10")
-            except Exception as mem_err:
-                logger.warning(f"Failed to save to memory: {mem_err}")
+            await _enqueue_memory_write(
+                memory_client,
+                memory_id,
+                actor_id,
+                session_id,
+                memory_content,
+            )
+            logger.info(f"Queued confidence tracking for memory: {topic} = {confidence_level}/10")
 
             result = {
                 "topic": topic,
@@ -151,7 +317,8 @@ def get_prepare_tools(memory_id: str, memory_client: MemoryClient, actor_id: str
                 "notes": notes,
                 "suggestion": suggestion,
                 "timestamp": timestamp,
-                "saved_to_memory": True
+                # Written to memory in the background shortly after this returns
+                "queued_for_memory": True
             }
 
             logger.info(f"Tracked confidence for {topic}: {confidence_level}/10 ({status})")
@@ -164,5 +331,6 @@ def get_prepare_tools(memory_id: str, memory_client: MemoryClient, actor_id: str
     # Return utility tools
     return [
         search_study_resources,
+        search_and_recall,
         track_topic_confidence,
     ]
@@ -4,10 +4,41 @@ Simple script to invoke Bedrock model once to enable it for the account.
 This triggers the auto-enablement for serverless foundation models.
 """
 
-import json
 import boto3
+from functools import lru_cache
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
+try:
+    import orjson
+except ImportError:  # stdlib fallback for environments without orjson
+    import json
+    orjson = None
+
+
+def _dumps(obj, indent: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None).encode('utf-8')
+
+
+def _loads(data: bytes):
+    """Parse UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+@lru_cache(maxsize=None)
+def _get_bedrock(region: str):
+    """Create the Bedrock Runtime client for a region once and reuse it"""
+    return boto3.client(
+        service_name="bedrock-runtime",
+        region_name=region,
+        config=Config(max_pool_connections=20)
+    )
+
+
 def enable_bedrock_model():
     """Invoke the Bedrock model to enable it for the account."""
 
@@ -17,11 +48,8 @@ def enable_bedrock_model():
     print(f"Attempting to invoke model: {model_id}")
     print(f"Region: {region}")
 
-    # Create Bedrock Runtime client
-    bedrock_runtime = boto3.client(
-        service_name="bedrock-runtime",
-        region_name=region
-    )
+    # Get Bedrock Runtime client
+    bedrock_runtime = _get_bedrock(region)
 
     # Prepare minimal request payload
     request_body = {
@@ -39,14 +67,14 @@ def enable_bedrock_model():
         # Invoke the model
         response = bedrock_runtime.invoke_model(
             modelId=model_id,
-            body=json.dumps(request_body)
+            body=_dumps(request_body)
         )
 
         # Read the response
-        response_body = json.loads(response['body'].read())
+        response_body = _loads(response['body'].read())
 
         print("\n✓ Success! Model invoked successfully.")
-        print(f"Response: {json.dumps(response_body, indent=2)}")
+        print(f"Response: {_dumps(response_body, indent=True).decode('utf-8')}")
         print("\nThe model is now enabled for your account.")
         return True
 
@@ -3,57 +3,142 @@ from prompt import SYSTEM_PROMPT
 from strands import Agent, tool
 from strands.models import BedrockModel
 from urllib.parse import quote
+import asyncio
+import hashlib
 import httpx
 import os
+import time
 import uuid
 import logging
+from contextvars import ContextVar
+from typing import AsyncIterator
 from uuid import uuid4
 from a2a.client import A2ACardResolver, ClientConfig, ClientFactory
+from a2a.client.errors import A2AClientHTTPError, A2AClientTimeoutError
 from a2a.types import Message, Part, Role, TextPart
+from cachetools import LRUCache, TTLCache
 
 IS_DOCKER = os.getenv("DOCKER_CONTAINER", "0") == "1"
 BEDROCK_MODEL_ID = os.getenv("BEDROCK_MODEL_ID", "global.anthropic.claude-sonnet-4-5-20250929-v1:0")
+# Bearer tokens are reused for this long before fetching a fresh one
+A2A_TOKEN_TTL = int(os.getenv("A2A_TOKEN_TTL", "3000"))  # seconds
+A2A_TOKEN_REFRESH_MARGIN = 30  # seconds
+# Session and actor of the request being served. The sub-agent tools are
+# shared by every session, so these are stamped onto each call at send time
+_REQUEST_SESSION_ID: ContextVar[str | None] = ContextVar("request_session_id", default=None)
+_REQUEST_ACTOR_ID: ContextVar[str | None] = ContextVar("request_actor_id", default=None)
+# Recent sub-agent responses, keyed by (agent, session, actor, message digest),
+# so a repeated question within the TTL skips the round trip
+_RESPONSE_CACHE = TTLCache(maxsize=256, ttl=60)
+# Futures for sub-agent calls in progress, by the same key as the response
+# cache, so identical concurrent calls share one request
+_INFLIGHT: dict[tuple, asyncio.Future] = {}
+# Transient sub-agent failures are retried with exponential backoff; after
+# repeated failures an agent is failed fast for a cool-down period
+A2A_RETRY_ATTEMPTS = 3
+A2A_RETRY_BASE_DELAY = 0.2  # seconds
+A2A_RETRY_MAX_DELAY = 2.0  # seconds
+A2A_CIRCUIT_FAILURES = 5
+A2A_CIRCUIT_COOLDOWN = 30.0  # seconds
+# Maximum sub-agent calls in flight for one parallel_agents invocation
+A2A_MAX_CONCURRENCY = int(os.getenv("A2A_MAX_CONCURRENCY", "4"))
+# Sub-agent tools shared by every session (see _shared_agent_tools)
+_AGENT_TOOLS: dict[str, "A2AAgentTool"] = {}
+# Host agents, each with its own Strands conversation, by (session, actor);
+# the least recently used are dropped beyond this many
+HOST_AGENT_CACHE_SIZE = int(os.getenv("HOST_AGENT_CACHE_SIZE", "256"))
+_HOST_AGENTS = LRUCache(maxsize=HOST_AGENT_CACHE_SIZE)
 
 if IS_DOCKER:
-    from utils import get_ssm_parameter, get_aws_info
+    from utils import get_ssm_parameters, get_aws_info
 else:
-    from host_strands_agent.utils import get_ssm_parameter, get_aws_info
+    from host_strands_agent.utils import get_ssm_parameters, get_aws_info
 
 logger = logging.getLogger(__name__)
 
 # AWS and agent configuration
 account_id, region = get_aws_info()
 
-# Only load agents that are deployed
-ECHOINK_AGENT_ID = get_ssm_parameter("/echoinkagent/agentcore/runtime-id")
-ECHOINK_PROVIDER_NAME = get_ssm_parameter("/echoinkagent/agentcore/provider-name")
+# Only load agents that are deployed (one batched SSM lookup)
+_ssm = get_ssm_parameters((
+    "/echoinkagent/agentcore/runtime-id",
+    "/echoinkagent/agentcore/provider-name",
+    "/echoprepareagent/agentcore/runtime-id",
+    "/echoprepareagent/agentcore/provider-name",
+    "/videoagent/agentcore/runtime-id",
+    "/videoagent/agentcore/provider-name",
+    "/documentsagent/agentcore/runtime-id",
+    "/documentsagent/agentcore/provider-name",
+))
+
+ECHOINK_AGENT_ID = _ssm["/echoinkagent/agentcore/runtime-id"]
+ECHOINK_PROVIDER_NAME = _ssm["/echoinkagent/agentcore/provider-name"]
 ECHOINK_AGENT_ARN = (
     f"arn:aws:bedrock-agentcore:{region}:{account_id}:runtime/{ECHOINK_AGENT_ID}"
 )
 
-ECHOPREPARE_AGENT_ID = get_ssm_parameter("/echoprepareagent/agentcore/runtime-id")
-ECHOPREPARE_PROVIDER_NAME = get_ssm_parameter("/echoprepareagent/agentcore/provider-name")
+ECHOPREPARE_AGENT_ID = _ssm["/echoprepareagent/agentcore/runtime-id"]
+ECHOPREPARE_PROVIDER_NAME = _ssm["/echoprepareagent/agentcore/provider-name"]
 ECHOPREPARE_AGENT_ARN = (
     f"arn:aws:bedrock-agentcore:{region}:{account_id}:runtime/{ECHOPREPARE_AGENT_ID}"
 )
 
 # Video and Documents agents (new flows)
-VIDEO_AGENT_ID = get_ssm_parameter("/videoagent/agentcore/runtime-id")
-VIDEO_PROVIDER_NAME = get_ssm_parameter("/videoagent/agentcore/provider-name")
+VIDEO_AGENT_ID = _ssm["/videoagent/agentcore/runtime-id"]
+VIDEO_PROVIDER_NAME = _ssm["/videoagent/agentcore/provider-name"]
 VIDEO_AGENT_ARN = (
     f"arn:aws:bedrock-agentcore:{region}:{account_id}:runtime/{VIDEO_AGENT_ID}"
 )
 
-DOCUMENTS_AGENT_ID = get_ssm_parameter("/documentsagent/agentcore/runtime-id")
-DOCUMENTS_PROVIDER_NAME = get_ssm_parameter("/documentsagent/agentcore/provider-name")
+DOCUMENTS_AGENT_ID = _ssm["/documentsagent/agentcore/runtime-id"]
+DOCUMENTS_PROVIDER_NAME = _ssm["/documentsagent/agentcore/provider-name"]
 DOCUMENTS_AGENT_ARN = (
     f"arn:aws:bedrock-agentcore:{region}:{account_id}:runtime/{DOCUMENTS_AGENT_ID}"
 )
 
 
+def _invocation_url(agent_arn: str) -> str:
+    """AgentCore runtime invocation URL for an agent ARN"""
+    return (
+        f"https://bedrock-agentcore.{region}.amazonaws.com/runtimes/"
+        f"{quote(agent_arn, safe='')}/invocations"
+    )
+
+
+# Agent endpoints, built once at import
+ECHOINK_AGENT_URL = _invocation_url(ECHOINK_AGENT_ARN)
+ECHOPREPARE_AGENT_URL = _invocation_url(ECHOPREPARE_AGENT_ARN)
+VIDEO_AGENT_URL = _invocation_url(VIDEO_AGENT_ARN)
+DOCUMENTS_AGENT_URL = _invocation_url(DOCUMENTS_AGENT_ARN)
+AGENT_CARD_PATH = "/.well-known/agent-card.json"
+
+
+# The static system prompt followed by a Bedrock cache point, so it is not
+# re-processed on every turn
+_SYSTEM_PROMPT_CONTENT = [{"text": SYSTEM_PROMPT}, {"cachePoint": {"type": "default"}}]
+
+
+def _is_transient(error: Exception) -> bool:
+    """Whether a failed sub-agent call is worth retrying"""
+    if isinstance(error, (httpx.TimeoutException, httpx.RemoteProtocolError, A2AClientTimeoutError)):
+        return True
+    if isinstance(error, A2AClientHTTPError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def set_request_context(session_id: str, actor_id: str) -> None:
+    """Attribute sub-agent calls made while serving the current request to its session and actor"""
+    _REQUEST_SESSION_ID.set(session_id)
+    _REQUEST_ACTOR_ID.set(actor_id)
+
+
 class A2AAgentTool:
     """A2A Agent Tool for communicating with remote agents via A2A protocol"""
-    
+
+    # Process-wide cap on in-flight requests per sub-agent, shared by all sessions
+    _semaphores: dict[str, asyncio.Semaphore] = {}
+
     def __init__(self, agent_url: str, agent_name: str, provider_name: str, session_id: str, actor_id: str):
         self.agent_url = agent_url
         self.agent_name = agent_name
@@ -61,10 +146,36 @@ class A2AAgentTool:
         self.session_id = session_id
         self.actor_id = actor_id
         self.agent_card = None
+        # Connection state reused across calls (see _get_a2a_client)
+        self._client = None
+        self._a2a_client = None
+        self._token_expiry = 0.0
+        self._lock = asyncio.Lock()
+        self._consecutive_failures = 0
+        self._circuit_open_until = 0.0
+        self._semaphore = A2AAgentTool._semaphores.setdefault(
+            agent_name,
+            asyncio.Semaphore(int(os.getenv(f"{agent_name.upper()}_CONCURRENCY", "8"))),
+        )
         logger.info(f"Initializing A2A tool for {agent_name} at {agent_url}")
 
-    def _get_authenticated_client(self) -> httpx.AsyncClient:
-        """Create an authenticated httpx client"""
+    @property
+    def current_session_id(self) -> str:
+        """Session of the request being served, defaulting to the tool's own"""
+        return _REQUEST_SESSION_ID.get() or self.session_id
+
+    @property
+    def current_actor_id(self) -> str:
+        """Actor of the request being served, defaulting to the tool's own"""
+        return _REQUEST_ACTOR_ID.get() or self.actor_id
+
+    async def _stamp_request(self, request: httpx.Request) -> None:
+        """httpx request hook: add the current session and actor headers"""
+        request.headers["X-Amzn-Bedrock-AgentCore-Runtime-Session-Id"] = self.current_session_id
+        request.headers["X-Amzn-Bedrock-AgentCore-Runtime-Custom-Actorid"] = self.current_actor_id
+
+    def _fetch_bearer_token(self) -> str:
+        """Fetch a fresh M2M bearer token for the agent's provider"""
         @requires_access_token(
             provider_name=self.provider_name,
             scopes=[],
@@ -72,20 +183,207 @@ class A2AAgentTool:
             into="bearer_token",
             force_authentication=True,
         )
-        def _create_client(bearer_token: str = str()) -> httpx.AsyncClient:
-            headers = {
-                "Authorization": f"Bearer {bearer_token}",
-                "X-Amzn-Bedrock-AgentCore-Runtime-Session-Id": self.session_id,
-                "X-Amzn-Bedrock-AgentCore-Runtime-Custom-Actorid": self.actor_id,
-            }
+        def _get_token(bearer_token: str = str()) -> str:
+            return bearer_token
+
+        return _get_token()
+
+    def _token_valid(self) -> bool:
+        """Whether the current bearer token is still comfortably before expiry"""
+        return time.time() < self._token_expiry - A2A_TOKEN_REFRESH_MARGIN
+
+    async def _get_authenticated_client(self) -> httpx.AsyncClient:
+        """Return the shared httpx client, refreshing its bearer token when near expiry"""
+        if self._client is not None and self._token_valid():
+            return self._client
+
+        async with self._lock:
+            if self._client is None or not self._token_valid():
+                # Token fetch is blocking; run it off the loop so warmups overlap
+                bearer_token = await asyncio.to_thread(self._fetch_bearer_token)
+                if self._client is None:
+                    # HTTP/2 multiplexes concurrent calls to the agent over one connection
+                    self._client = httpx.AsyncClient(
+                        http2=True,
+                        timeout=httpx.Timeout(timeout=300.0),
+                        event_hooks={"request": [self._stamp_request]},
+                        limits=httpx.Limits(
+                            max_keepalive_connections=20, max_connections=20, keepalive_expiry=60
+                        ),
+                    )
+                self._client.headers["Authorization"] = f"Bearer {bearer_token}"
+                self._token_expiry = time.time() + A2A_TOKEN_TTL
+        return self._client
+
+    async def _ensure_token(self) -> None:
+        """Make sure a valid bearer token (and the shared client) is ready"""
+        await self._get_authenticated_client()
+
+    async def _ensure_card(self):
+        """Resolve the agent card once and keep it"""
+        if self.agent_card is None:
+            httpx_client = await self._get_authenticated_client()
+            resolver = A2ACardResolver(httpx_client=httpx_client, base_url=self.agent_url)
+            self.agent_card = await resolver.get_agent_card()
+        return self.agent_card
+
+    async def _get_a2a_client(self):
+        """Return the A2A client, resolving the agent card on first use"""
+        httpx_client = await self._get_authenticated_client()
+        if self._a2a_client is None:
+            # Concurrent first calls (e.g. parallel_agents) build the client once
+            async with self._lock:
+                if self._a2a_client is None:
+                    if self.agent_card is None:
+                        resolver = A2ACardResolver(httpx_client=httpx_client, base_url=self.agent_url)
+                        self.agent_card = await resolver.get_agent_card()
+
+                    # Create client using factory
+                    config = ClientConfig(
+                        httpx_client=httpx_client,
+                        streaming=True,  # Receive sub-agent output as it is generated
+                    )
+                    self._a2a_client = ClientFactory(config).create(self.agent_card)
+        return self._a2a_client
+
+    def _reset_connection(self) -> None:
+        """Force re-authentication and client creation on the next call"""
+        self._a2a_client = None
+        self._token_expiry = 0.0
+
+    async def aclose(self) -> None:
+        """Close the shared httpx client"""
+        self._a2a_client = None
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.aclose()
+
+    async def _respond(self, message: str) -> AsyncIterator[tuple[str, str]]:
+        """
+        Send a message to the A2A agent, yielding (new text, full response so
+        far) pairs as the response arrives. The last pair carries the final response.
+        """
+        cache_key = (
+            self.agent_name,
+            self.current_session_id,
+            self.current_actor_id,
+            hashlib.blake2b(message.encode(), digest_size=16).digest(),
+        )
+        cached = _RESPONSE_CACHE.get(cache_key)
+        if cached is not None:
+            logger.info(f"Using cached response from {self.agent_name}")
+            yield cached, cached
+            return
+
+        inflight = _INFLIGHT.get(cache_key)
+        if inflight is not None:
+            logger.info(f"Joining in-flight call to {self.agent_name}")
+            response_text = await asyncio.shield(inflight)
+            if response_text is not None:
+                yield response_text, response_text
+                return
+            # The original caller gave up before finishing; make our own call
+
+        future = asyncio.get_running_loop().create_future()
+        _INFLIGHT[cache_key] = future
+        response_text = ""
+        try:
+            async for delta, response_text in self._send(message, cache_key):
+                yield delta, response_text
+            future.set_result(response_text)
+        finally:
+            if _INFLIGHT.get(cache_key) is future:
+                del _INFLIGHT[cache_key]
+            if not future.done():
+                future.set_result(None)
 
-            return httpx.AsyncClient(
-                timeout=httpx.Timeout(timeout=300.0),
-                headers=headers,
-                limits=httpx.Limits(max_keepalive_connections=5, max_connections=10),
-            )
+    async def call_agent_stream(self, message: str) -> AsyncIterator[str]:
+        """
+        Send a message to the A2A agent and yield its response text as it arrives.
 
-        return _create_client()
+        Args:
+            message: The message to send to the agent
+
+        Yields:
+            New chunks of the response from the A2A agent
+        """
+        async for delta, _ in self._respond(message):
+            if delta:
+                yield delta
+
+    async def _send(self, message: str, cache_key: tuple) -> AsyncIterator[tuple[str, str]]:
+        """Send a message to the A2A agent with retries, yielding (new text, full response so far)"""
+        if time.monotonic() < self._circuit_open_until:
+            logger.warning(f"Not calling {self.agent_name}: failing fast after repeated errors")
+            unavailable = f"{self.agent_name} is temporarily unavailable after repeated errors. Try again shortly."
+            yield unavailable, unavailable
+            return
+
+        print(f"[A2A_CALL] Calling {self.agent_name} with message: {message[:100]}...", flush=True)
+        logger.info(f"Calling {self.agent_name} with message: {message[:100]}...")
+
+        streamed = ""
+        for attempt in range(A2A_RETRY_ATTEMPTS):
+            response = _ResponseText()
+            try:
+                # Reuse the authenticated client and resolved agent card
+                client = await self._get_a2a_client()
+
+                # Create and send message
+                msg = Message(
+                    kind="message",
+                    role=Role.user,
+                    parts=[Part(TextPart(kind="text", text=message))],
+                    message_id=uuid4().bytes.hex(),
+                )
+
+                async with self._semaphore:
+                    async for event in client.send_message(msg):
+                        response.update(event)
+                        text = response.text
+                        # Stream only text that extends what was already sent; a
+                        # rewritten snapshot can't be unsent, but the final response
+                        # below still carries it
+                        if len(text) > len(streamed) and text.startswith(streamed):
+                            delta, streamed = text[len(streamed):], text
+                            yield delta, text
+                break
+
+            except Exception as e:
+                # The token may have been revoked or the connection broken
+                self._reset_connection()
+
+                # Retry only transient errors, and only before any output was streamed
+                if not streamed and attempt + 1 < A2A_RETRY_ATTEMPTS and _is_transient(e):
+                    delay = min(A2A_RETRY_MAX_DELAY, A2A_RETRY_BASE_DELAY * 2 ** attempt)
+                    logger.warning(f"Transient error contacting {self.agent_name} ({type(e).__name__}: {e}); retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    continue
+
+                self._consecutive_failures += 1
+                if self._consecutive_failures >= A2A_CIRCUIT_FAILURES:
+                    self._circuit_open_until = time.monotonic() + A2A_CIRCUIT_COOLDOWN
+
+                import traceback
+                error_details = traceback.format_exc()
+                error_msg = f"[A2A_ERROR] Error contacting {self.agent_name}: {type(e).__name__}: {str(e)}\n{error_details}"
+                print(error_msg, flush=True)  # Print to stdout for CloudWatch
+                logger.error(error_msg)
+                error_text = f"Error contacting {self.agent_name}: {type(e).__name__}: {str(e)}"
+                yield error_text, error_text
+                return
+
+        self._consecutive_failures = 0
+        response_text = response.text
+        if not response_text:
+            response_text = f"No response received from {self.agent_name}"
+            yield response_text, response_text
+            return
+
+        # Only successful responses are cached
+        _RESPONSE_CACHE[cache_key] = response_text
+        logger.info(f"Received response from {self.agent_name}: {response_text[:100]}...")
+        yield "", response_text
 
     async def call_agent(self, message: str) -> str:
         """
@@ -97,65 +395,91 @@ class A2AAgentTool:
         Returns:
             Response from the A2A agent
         """
-        try:
-            print(f"[A2A_CALL] Calling {self.agent_name} with message: {message[:100]}...", flush=True)
-            logger.info(f"Calling {self.agent_name} with message: {message[:100]}...")
-            
-            # Create authenticated client
-            httpx_client = self._get_authenticated_client()
-            
-            # Get agent card
-            resolver = A2ACardResolver(httpx_client=httpx_client, base_url=self.agent_url)
-            agent_card = await resolver.get_agent_card()
+        response_text = ""
+        async for _, response_text in self._respond(message):
+            pass
+        return response_text
 
-            # Create client using factory
-            config = ClientConfig(
-                httpx_client=httpx_client,
-                streaming=False,  # Use non-streaming mode for sync response
-            )
-            factory = ClientFactory(config)
-            client = factory.create(agent_card)
-
-            # Create and send message
-            msg = Message(
-                kind="message",
-                role=Role.user,
-                parts=[Part(TextPart(kind="text", text=message))],
-                message_id=uuid4().hex,
-            )
 
-            # Send message and collect response
-            response_text = ""
-            async for event in client.send_message(msg):
-                if isinstance(event, Message):
-                    for part in event.parts:
-                        if hasattr(part, 'text') and part.text:
-                            response_text += part.text
-                elif isinstance(event, tuple) and len(event) == 2:
-                    # (Task, UpdateEvent) tuple - extract text from Task artifacts
-                    task, update_event = event
-                    if hasattr(task, "artifacts") and task.artifacts:
-                        for artifact in task.artifacts:
-                            if hasattr(artifact, "parts") and artifact.parts:
-                                for part in artifact.parts:
-                                    if hasattr(part, "root") and hasattr(part.root, "text"):
-                                        response_text += part.root.text
-
-            await httpx_client.aclose()
-            
-            if not response_text:
-                response_text = f"No response received from {self.agent_name}"
-                
-            logger.info(f"Received response from {self.agent_name}: {response_text[:100]}...")
-            return response_text
+def _parts_text(parts) -> str:
+    """Concatenate the text of A2A message or artifact parts"""
+    texts = []
+    for part in parts or ():
+        text = getattr(part, "text", None) or getattr(getattr(part, "root", None), "text", None)
+        if text:
+            texts.append(text)
+    return "".join(texts)
 
-        except Exception as e:
-            import traceback
-            error_details = traceback.format_exc()
-            error_msg = f"[A2A_ERROR] Error contacting {self.agent_name}: {type(e).__name__}: {str(e)}\n{error_details}"
-            print(error_msg, flush=True)  # Print to stdout for CloudWatch
-            logger.error(error_msg)
-            return f"Error contacting {self.agent_name}: {type(e).__name__}: {str(e)}"
+
+class _ResponseText:
+    """
+    Assemble a sub-agent's response from A2A client events, by event type:
+    status-update messages carry the text accumulated so far, artifact updates
+    carry a chunk to append when append is set and the whole artifact
+    otherwise, and direct Messages and final task snapshots carry everything.
+    """
+
+    def __init__(self):
+        self.status = ""
+        self.artifacts: dict[str, str] = {}
+
+    @property
+    def text(self) -> str:
+        """The full response as known so far; artifacts hold the final result"""
+        return "".join(self.artifacts.values()) or self.status
+
+    def update(self, event) -> None:
+        """Fold one client event (a Message or a (Task, update) pair) into the response"""
+        if isinstance(event, Message):
+            self.status = _parts_text(event.parts)
+            return
+        if not isinstance(event, tuple) or len(event) != 2:
+            return
+
+        task, update_event = event
+        if update_event is None:
+            # Task snapshot - its artifacts, once present, are the whole response
+            artifacts = {artifact.artifact_id: _parts_text(artifact.parts) for artifact in task.artifacts or ()}
+            if any(artifacts.values()):
+                self.artifacts = artifacts
+            return
+
+        artifact = getattr(update_event, "artifact", None)
+        if artifact is not None:
+            chunk = _parts_text(artifact.parts)
+            if getattr(update_event, "append", False):
+                chunk = self.artifacts.get(artifact.artifact_id, "") + chunk
+            self.artifacts[artifact.artifact_id] = chunk
+            return
+
+        message = getattr(getattr(update_event, "status", None), "message", None)
+        if message is not None:
+            text = _parts_text(message.parts)
+            if text:
+                self.status = text
+
+
+def _shared_agent_tools(session_id: str, actor_id: str) -> dict[str, A2AAgentTool]:
+    """
+    Return the process-wide sub-agent tools, by the name the model uses for
+    them, creating them on first use. Calls are stamped with the session and
+    actor of the request being served; the ids given here are only a fallback.
+    """
+    if not _AGENT_TOOLS:
+        for agent_name, agent_url, provider_name in (
+            ("echoink_agent", ECHOINK_AGENT_URL, ECHOINK_PROVIDER_NAME),
+            ("echoprepare_agent", ECHOPREPARE_AGENT_URL, ECHOPREPARE_PROVIDER_NAME),
+            ("video_agent", VIDEO_AGENT_URL, VIDEO_PROVIDER_NAME),
+            ("documents_agent", DOCUMENTS_AGENT_URL, DOCUMENTS_PROVIDER_NAME),
+        ):
+            _AGENT_TOOLS[agent_name] = A2AAgentTool(
+                agent_url=agent_url,
+                agent_name=agent_name,
+                provider_name=provider_name,
+                session_id=session_id,
+                actor_id=actor_id,
+            )
+    return _AGENT_TOOLS
 
 
 class HostAgent:
@@ -165,58 +489,17 @@ class HostAgent:
         self.session_id = session_id
         self.actor_id = actor_id
         
-        # Create A2A agent tools for available agents only
-        echoink_agent_url = (
-            f"https://bedrock-agentcore.{region}.amazonaws.com/runtimes/"
-            f"{quote(ECHOINK_AGENT_ARN, safe='')}/invocations"
-        )
-
-        echoprepare_agent_url = (
-            f"https://bedrock-agentcore.{region}.amazonaws.com/runtimes/"
-            f"{quote(ECHOPREPARE_AGENT_ARN, safe='')}/invocations"
-        )
-
-        self.echoink_tool = A2AAgentTool(
-            agent_url=echoink_agent_url,
-            agent_name="echoink_agent",
-            provider_name=ECHOINK_PROVIDER_NAME,
-            session_id=session_id,
-            actor_id=actor_id
-        )
-
-        self.echoprepare_tool = A2AAgentTool(
-            agent_url=echoprepare_agent_url,
-            agent_name="echoprepare_agent",
-            provider_name=ECHOPREPARE_PROVIDER_NAME,
-            session_id=session_id,
-            actor_id=actor_id
-        )
-
-        # Video and Documents agent URLs
-        video_agent_url = (
-            f"https://bedrock-agentcore.{region}.amazonaws.com/runtimes/"
-            f"{quote(VIDEO_AGENT_ARN, safe='')}/invocations"
-        )
-        documents_agent_url = (
-            f"https://bedrock-agentcore.{region}.amazonaws.com/runtimes/"
-            f"{quote(DOCUMENTS_AGENT_ARN, safe='')}/invocations"
-        )
-
-        self.video_tool = A2AAgentTool(
-            agent_url=video_agent_url,
-            agent_name="video_agent",
-            provider_name=VIDEO_PROVIDER_NAME,
-            session_id=session_id,
-            actor_id=actor_id
-        )
-
-        self.documents_tool = A2AAgentTool(
-            agent_url=documents_agent_url,
-            agent_name="documents_agent",
-            provider_name=DOCUMENTS_PROVIDER_NAME,
-            session_id=session_id,
-            actor_id=actor_id
-        )
+        # Sub-agent tools (connections, tokens, agent cards) are shared by all
+        # sessions; each session only gets its own Strands agent and history
+        self.agent_tools = _shared_agent_tools(session_id, actor_id)
+        self.echoink_tool = self.agent_tools["echoink_agent"]
+        self.echoprepare_tool = self.agent_tools["echoprepare_agent"]
+        self.video_tool = self.agent_tools["video_agent"]
+        self.documents_tool = self.agent_tools["documents_agent"]
+
+        self._prefetch = None
+        # A Strands agent runs one invocation at a time; queue a session's turns
+        self._turn_lock = asyncio.Lock()
 
         # Create Bedrock model
         bedrock_model = BedrockModel(model_id=BEDROCK_MODEL_ID, region_name=region)
@@ -225,22 +508,36 @@ class HostAgent:
         self.agent = Agent(
             name="Host Agent",
             description="Intelligent orchestrator that delegates tasks to specialized educational agents",
-            system_prompt=SYSTEM_PROMPT,
+            system_prompt=_SYSTEM_PROMPT_CONTENT,
             model=bedrock_model,
             tools=[
                 self._create_echoink_tool(),
                 self._create_echoprepare_tool(),
                 self._create_video_tool(),
                 self._create_documents_tool(),
+                self._create_parallel_tool(),
             ]
         )
         
-        logger.info("Host Agent initialized with Strands framework and A2A tools (EchoInk, EchoPrepare, Video, Documents)")
+        logger.info("Host Agent initialized with Strands framework and A2A tools (EchoInk, EchoPrepare, Video, Documents, parallel)")
+
+    @staticmethod
+    async def _relay(agent_tool: A2AAgentTool, message: str) -> AsyncIterator[dict | str]:
+        """
+        Stream a sub-agent's new response text as {"delta": ...} tool progress
+        events. Strands uses the last value yielded, the full response, as the
+        tool result.
+        """
+        response_text = ""
+        async for delta, response_text in agent_tool._respond(message):
+            if delta:
+                yield {"delta": delta}
+        yield response_text
 
     def _create_echoink_tool(self):
         """Create the echo ink agent tool"""
         @tool
-        async def echoink_agent(message: str) -> str:
+        async def echoink_agent(message: str) -> AsyncIterator[dict | str]:
             """
             Delegate educational document creation tasks to the Echo Ink agent.
             Use for creating course materials, lesson plans, assessments, and educational content.
@@ -251,14 +548,15 @@ class HostAgent:
             Returns:
                 Response from the Echo Ink agent
             """
-            return await self.echoink_tool.call_agent(message)
+            async for chunk in self._relay(self.echoink_tool, message):
+                yield chunk
 
         return echoink_agent
 
     def _create_echoprepare_tool(self):
         """Create the echo prepare agent tool"""
         @tool
-        async def echoprepare_agent(message: str) -> str:
+        async def echoprepare_agent(message: str) -> AsyncIterator[dict | str]:
             """
             Delegate student study and exam preparation tasks to the Echo Prepare agent.
             Use for helping students research topics, generate practice questions, create study notes,
@@ -270,14 +568,15 @@ class HostAgent:
             Returns:
                 Response from the Echo Prepare agent
             """
-            return await self.echoprepare_tool.call_agent(message)
+            async for chunk in self._relay(self.echoprepare_tool, message):
+                yield chunk
 
         return echoprepare_agent
 
     def _create_video_tool(self):
         """Create the video agent tool"""
         @tool
-        async def video_agent(message: str) -> str:
+        async def video_agent(message: str) -> AsyncIterator[dict | str]:
             """
             Delegate video analytics tasks to the Video Agent.
             Use for video metadata, transcripts, engagement metrics, polls, and insights.
@@ -288,14 +587,15 @@ class HostAgent:
             Returns:
                 Response from the Video Agent
             """
-            return await self.video_tool.call_agent(message)
+            async for chunk in self._relay(self.video_tool, message):
+                yield chunk
 
         return video_agent
 
     def _create_documents_tool(self):
         """Create the documents agent tool"""
         @tool
-        async def documents_agent(message: str) -> str:
+        async def documents_agent(message: str) -> AsyncIterator[dict | str]:
             """
             Delegate document management tasks to the Documents Agent.
             Use for document search, retrieval, analytics, and session management.
@@ -306,12 +606,79 @@ class HostAgent:
             Returns:
                 Response from the Documents Agent
             """
-            return await self.documents_tool.call_agent(message)
+            async for chunk in self._relay(self.documents_tool, message):
+                yield chunk
 
         return documents_agent
 
+    def _create_parallel_tool(self):
+        """Create the tool that calls several agents concurrently"""
+        @tool
+        async def parallel_agents(calls: list[dict]) -> list[str]:
+            """
+            Delegate several independent tasks at once. The agents run concurrently,
+            so use this whenever no task needs another task's result.
+
+            Args:
+                calls: List of {"agent": <agent tool name>, "message": <task>} entries,
+                    where agent is one of echoink_agent, echoprepare_agent,
+                    video_agent or documents_agent
+
+            Returns:
+                One response per call, in the same order as calls
+            """
+            semaphore = asyncio.Semaphore(A2A_MAX_CONCURRENCY)
+
+            async def run(call: dict) -> str:
+                agent_name = call.get("agent")
+                agent_tool = self.agent_tools.get(agent_name)
+                if agent_tool is None:
+                    return f"Unknown agent: {agent_name}"
+                async with semaphore:
+                    return await agent_tool.call_agent(call.get("message", ""))
+
+            results = await asyncio.gather(*(run(call) for call in calls), return_exceptions=True)
+            return [
+                f"Error: {type(result).__name__}: {result}" if isinstance(result, Exception) else result
+                for result in results
+            ]
+
+        return parallel_agents
+
+    async def warmup(self) -> None:
+        """Authenticate and resolve all agent cards concurrently"""
+        agent_tools = list(self.agent_tools.values())
+        results = await asyncio.gather(
+            *(agent_tool._ensure_card() for agent_tool in agent_tools),
+            return_exceptions=True,
+        )
+        for agent_tool, result in zip(agent_tools, results):
+            if isinstance(result, Exception):
+                # Not fatal: the card is resolved again on the agent's first call
+                logger.warning(f"Could not resolve agent card for {agent_tool.agent_name}: {result}")
+
+    def _prefetch_tokens(self) -> None:
+        """
+        Refresh sub-agent bearer tokens in the background while the model works
+        on the prompt. Tool calls made meanwhile wait on the same refresh via the
+        tool's lock rather than starting their own.
+        """
+        if self._prefetch is None or self._prefetch.done():
+            self._prefetch = asyncio.ensure_future(asyncio.gather(
+                *(agent_tool._ensure_token() for agent_tool in self.agent_tools.values()),
+                return_exceptions=True,
+            ))
+
     async def stream(self, query: str):
         """Stream response from the agent"""
+        set_request_context(self.session_id, self.actor_id)
+        self._prefetch_tokens()
+        async with self._turn_lock:
+            async for event in self._stream(query):
+                yield event
+
+    async def _stream(self, query: str):
+        """Stream one turn of the Strands agent as host agent events"""
         try:
             async for event in self.agent.stream_async(query):
                 if "data" in event:
@@ -320,6 +687,21 @@ class HostAgent:
                         "require_user_input": False,
                         "content": event["data"],
                     }
+                elif "tool_stream_event" in event:
+                    # New sub-agent response text, kept apart from the host's own
+                    # reply; the tool's final full-response yield is not progress
+                    tool_stream = event["tool_stream_event"]
+                    data = tool_stream.get("data")
+                    if isinstance(data, dict) and "delta" in data:
+                        yield {
+                            "is_task_complete": False,
+                            "require_user_input": False,
+                            "content": "",
+                            "agent_progress": {
+                                "agent": tool_stream.get("tool_use", {}).get("name"),
+                                "content": data["delta"],
+                            },
+                        }
         except Exception as e:
             logger.error(f"Error in agent streaming: {e}", exc_info=True)
             yield {
@@ -334,8 +716,20 @@ class HostAgent:
                 "content": "",
             }
 
+    async def invoke_async(self, query: str) -> str:
+        """Invoke the agent without blocking the event loop"""
+        set_request_context(self.session_id, self.actor_id)
+        self._prefetch_tokens()
+        try:
+            async with self._turn_lock:
+                return str(await self.agent.invoke_async(query))
+        except Exception as e:
+            logger.error(f"Error invoking agent: {e}", exc_info=True)
+            raise Exception(f"Error invoking agent: {e}")
+
     def invoke(self, query: str) -> str:
-        """Invoke the agent synchronously"""
+        """Invoke the agent synchronously (for non-async callers; use invoke_async in a coroutine)"""
+        set_request_context(self.session_id, self.actor_id)
         try:
             return str(self.agent(query))
         except Exception as e:
@@ -344,8 +738,17 @@ class HostAgent:
 
 
 def get_host_agent(session_id: str, actor_id: str) -> HostAgent:
-    """Create and return a host agent instance"""
-    return HostAgent(session_id=session_id, actor_id=actor_id)
+    """Return the host agent for a session and actor, creating it on first use"""
+    key = (session_id, actor_id)
+    host_agent = _HOST_AGENTS.get(key)
+    if host_agent is None:
+        host_agent = _HOST_AGENTS[key] = HostAgent(session_id=session_id, actor_id=actor_id)
+    return host_agent
+
+
+async def close_agent_tools() -> None:
+    """Close the shared sub-agent connections"""
+    await asyncio.gather(*(agent_tool.aclose() for agent_tool in _AGENT_TOOLS.values()))
 
 
 async def get_agent_and_card(session_id: str, actor_id: str):
@@ -354,7 +757,11 @@ async def get_agent_and_card(session_id: str, actor_id: str):
     This maintains compatibility with the existing main.py structure.
     """
     host_agent = get_host_agent(session_id=session_id, actor_id=actor_id)
-    
+
+    # Resolve all agent cards up front, concurrently, rather than one at a
+    # time on each agent's first delegation
+    await host_agent.warmup()
+
     # Return agent cards info for compatibility (all agents)
     agents_cards = {
         "echoink_agent": {
@@ -363,7 +770,7 @@ async def get_agent_and_card(session_id: str, actor_id: str):
                 "description": "Creates educational documents, lesson plans, and course materials",
                 "version": "1.0"
             },
-            "agent_card_url": f"https://bedrock-agentcore.{region}.amazonaws.com/runtimes/{quote(ECHOINK_AGENT_ARN, safe='')}/invocations/.well-known/agent-card.json"
+            "agent_card_url": ECHOINK_AGENT_URL + AGENT_CARD_PATH
         },
         "echoprepare_agent": {
             "agent_card": {
@@ -371,7 +778,7 @@ async def get_agent_and_card(session_id: str, actor_id: str):
                 "description": "Helps students study and prepare for exams with practice questions and study materials",
                 "version": "1.0"
             },
-            "agent_card_url": f"https://bedrock-agentcore.{region}.amazonaws.com/runtimes/{quote(ECHOPREPARE_AGENT_ARN, safe='')}/invocations/.well-known/agent-card.json"
+            "agent_card_url": ECHOPREPARE_AGENT_URL + AGENT_CARD_PATH
         },
         "video_agent": {
             "agent_card": {
@@ -379,7 +786,7 @@ async def get_agent_and_card(session_id: str, actor_id: str):
                 "description": "Educational video analytics — metadata, transcripts, engagement, polls, and insights",
                 "version": "1.0"
             },
-            "agent_card_url": f"https://bedrock-agentcore.{region}.amazonaws.com/runtimes/{quote(VIDEO_AGENT_ARN, safe='')}/invocations/.well-known/agent-card.json"
+            "agent_card_url": VIDEO_AGENT_URL + AGENT_CARD_PATH
         },
         "documents_agent": {
             "agent_card": {
@@ -387,7 +794,7 @@ async def get_agent_and_card(session_id: str, actor_id: str):
                 "description": "Document management — context retrieval, analytics, and session management",
                 "version": "1.0"
             },
-            "agent_card_url": f"https://bedrock-agentcore.{region}.amazonaws.com/runtimes/{quote(DOCUMENTS_AGENT_ARN, safe='')}/invocations/.well-known/agent-card.json"
+            "agent_card_url": DOCUMENTS_AGENT_URL + AGENT_CARD_PATH
         },
     }
 
@@ -12,7 +12,7 @@ from a2a.utils import new_agent_text_message, new_task
 from a2a.utils.errors import ServerError
 import logging
 import os
-from agent import HostAgent
+from agent import get_host_agent
 
 logger = logging.getLogger(__name__)
 
@@ -24,23 +24,12 @@ class HostAgentExecutor(AgentExecutor):
 
     def __init__(self):
         """Initialize the executor"""
-        self._agent = None
         self._active_tasks = {}
         logger.info("HostAgentExecutor initialized")
 
     async def _get_agent(self, session_id: str, actor_id: str):
-        """Get or create the agent instance"""
-        if self._agent is None:
-            logger.info("Creating host agent...")
-
-            # Create agent instance
-            self._agent = HostAgent(
-                session_id=session_id,
-                actor_id=actor_id,
-            )
-            logger.info("Host agent created successfully")
-
-        return self._agent
+        """Get or create the session's agent instance"""
+        return get_host_agent(session_id=session_id, actor_id=actor_id)
 
     async def _execute_streaming(
         self,
@@ -139,7 +128,7 @@ class HostAgentExecutor(AgentExecutor):
 
             logger.info(f"User message: '{user_message}'")
 
-            # Get the agent instance
+            # Get the session's agent instance (sub-agent connections are shared)
             agent = await self._get_agent(session_id, actor_id)
 
             # Mark task as active
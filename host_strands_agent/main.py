@@ -1,3 +1,5 @@
+import asyncio
+import importlib
 import logging
 from dotenv import load_dotenv
 from bedrock_agentcore import BedrockAgentCoreApp
@@ -13,12 +15,12 @@ APP_NAME = "HostAgentA2A"
 
 app = BedrockAgentCoreApp()
 
-host_agent = None
+agent_module = None
 
 
 @app.entrypoint
 async def call_agent(payload: dict, context):
-    global host_agent
+    global agent_module
 
     session_id = context.session_id
     logger.info(f"Received request with session_id: {session_id}")
@@ -33,9 +35,11 @@ async def call_agent(payload: dict, context):
     if not session_id:
         raise Exception("Context session_id is not set")
 
-    if not host_agent:
-        # Import agent creation inside entrypoint so workload identity is available
-        from agent import get_agent_and_card
+    if agent_module is None:
+        # Import agent creation inside entrypoint so workload identity is available.
+        # The import makes blocking STS/SSM lookups, so keep them off the event loop
+        agent_module = await asyncio.to_thread(importlib.import_module, "agent")
+        get_agent_and_card = agent_module.get_agent_and_card
 
         logger.info("Initializing host agent and resolving agent cards...")
         try:
@@ -50,6 +54,10 @@ async def call_agent(payload: dict, context):
             raise
 
         yield agents_cards
+    else:
+        # Each session has its own host agent (and conversation); the
+        # sub-agent connections behind it are shared
+        host_agent = agent_module.get_host_agent(session_id=session_id, actor_id=actor_id)
 
     query = payload.get("prompt")
     logger.info(f"Processing query: {query}")
@@ -70,5 +78,14 @@ async def call_agent(payload: dict, context):
         }
 
 
+async def close_host_agent():
+    """Close the shared sub-agent connections on shutdown"""
+    if agent_module is not None:
+        await agent_module.close_agent_tools()
+
+
+app.add_event_handler("shutdown", close_host_agent)
+
+
 if __name__ == "__main__":
     app.run()  # Ready to run on Bedrock AgentCore
@@ -5,29 +5,34 @@ This script tests the agent locally without deploying to AgentCore.
 """
 
 import asyncio
+import functools
 import logging
 import os
 from pathlib import Path
 from dotenv import load_dotenv
 
-# Load environment variables
-env_path = Path(__file__).parent / ".env"
-load_dotenv(dotenv_path=env_path)
-
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _configure_logging():
+    """Send INFO logs to stderr, unless a runner has already configured logging"""
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(levelname)s:%(name)s:%(message)s"))
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+
 # Mock the SSM parameters for local testing
+_MOCK_SSM_PARAMS = {
+    f"/{agent}/agentcore/{key}": f"mock-{agent}-{key}"
+    for agent in ("echoinkagent", "echoprepareagent", "videoagent", "documentsagent")
+    for key in ("runtime-id", "provider-name")
+}
+
 def mock_get_ssm_parameter(param_name):
     """Mock SSM parameter retrieval for local testing"""
-    mock_params = {
-        "/monitoragent/agentcore/runtime-id": "mock-monitor-runtime-id",
-        "/monitoragent/agentcore/provider-name": "mock-monitor-provider",
-        "/websearchagent/agentcore/runtime-id": "mock-websearch-runtime-id", 
-        "/websearchagent/agentcore/provider-name": "mock-websearch-provider",
-    }
-    return mock_params.get(param_name, "mock-value")
+    return _MOCK_SSM_PARAMS.get(param_name, "mock-value")
 
 def mock_get_aws_info():
     """Mock AWS info for local testing"""
@@ -39,9 +44,12 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 # Mock the utils module
 class MockUtils:
+    get_ssm_parameter = staticmethod(mock_get_ssm_parameter)
+
     @staticmethod
-    def get_ssm_parameter(param_name):
-        return mock_get_ssm_parameter(param_name)
+    def get_ssm_parameters(param_names):
+        """Batch lookup, matching utils.get_ssm_parameters"""
+        return {name: _MOCK_SSM_PARAMS.get(name, "mock-value") for name in param_names}
     
     @staticmethod
     def get_aws_info():
@@ -49,95 +57,98 @@ class MockUtils:
 
 sys.modules['utils'] = MockUtils()
 
+@functools.lru_cache(maxsize=1)
+def _ensure_env_loaded():
+    """Load environment variables from .env once per process"""
+    load_dotenv(dotenv_path=Path(__file__).parent / ".env")
+    return True
+
+# The agent module reads its configuration when imported, so load .env first
+_ensure_env_loaded()
+
+# Set required environment variables (read when the agent module is imported)
+os.environ["BEDROCK_MODEL_ID"] = "global.anthropic.claude-sonnet-4-5-20250929-v1:0"
+# Without credentials the invoke test is expected to fail; don't let boto retry it
+os.environ.setdefault("AWS_MAX_ATTEMPTS", "1")
+
 # Now import the agent
 from agent import HostAgent
 
+# Fixed identity shared by the tests, so they reuse one agent
+TEST_SESSION_ID = "test-session-123"
+TEST_ACTOR_ID = "test-actor"
+
+@functools.lru_cache(maxsize=4)
+def _get_agent(session_id, actor_id):
+    """Build the host agent once per (session, actor) and share it between tests"""
+    return HostAgent(session_id=session_id, actor_id=actor_id)
+
 async def test_agent_creation():
     """Test creating the host agent"""
-    try:
-        logger.info("Testing host agent creation...")
-        
-        # Set required environment variables
-        os.environ["BEDROCK_MODEL_ID"] = "global.anthropic.claude-sonnet-4-5-20250929-v1:0"
-        
-        # Create agent
-        session_id = "test-session-123"
-        actor_id = "test-actor"
-        
-        agent = HostAgent(session_id=session_id, actor_id=actor_id)
-        
-        logger.info("✅ Host agent created successfully!")
-        logger.info(f"Agent name: {agent.agent.name}")
-        logger.info(f"Agent description: {agent.agent.description}")
-        logger.info(f"Number of tools: {len(agent.agent.tools)}")
-        
-        # List the tools
-        for i, tool in enumerate(agent.agent.tools):
-            logger.info(f"Tool {i+1}: {tool.__name__}")
-        
-        return True
-        
-    except Exception as e:
-        logger.error(f"❌ Failed to create host agent: {e}")
-        return False
+    logger.info("📝 Test 1: Agent Creation - testing host agent creation...")
+    
+    # Create agent (shared with the other test)
+    agent = _get_agent(TEST_SESSION_ID, TEST_ACTOR_ID)
+    
+    logger.info("✅ Host agent created successfully!")
+    logger.info("Agent name: %s", agent.agent.name)
+    logger.info("Agent description: %s", agent.agent.description)
+    tools = agent.agent.tools
+    logger.info("Number of tools: %d", len(tools))
+    
+    # List the tools in one log record
+    if logger.isEnabledFor(logging.INFO):
+        names = [tool.__name__ for tool in tools]
+        logger.info("Tools:\n%s", "\n".join("  %d: %s" % (i + 1, name) for i, name in enumerate(names)))
 
 async def test_agent_invoke():
     """Test invoking the agent with a simple query"""
+    logger.info("📝 Test 2: Agent Invocation Structure - testing agent invocation...")
+    
+    # Create agent (shared with the other test)
+    agent = _get_agent(TEST_SESSION_ID, TEST_ACTOR_ID)
+    
+    # Test query (this will fail with authentication but should show the structure)
+    test_query = "Hello, can you help me check the status of my AWS resources?"
+    
+    logger.info("Testing with query: %s", test_query)
+    
+    # This will likely fail due to authentication, but we can catch and analyze
     try:
-        logger.info("Testing agent invocation...")
-        
-        # Set required environment variables
-        os.environ["BEDROCK_MODEL_ID"] = "global.anthropic.claude-sonnet-4-5-20250929-v1:0"
-        
-        # Create agent
-        session_id = "test-session-123"
-        actor_id = "test-actor"
-        
-        agent = HostAgent(session_id=session_id, actor_id=actor_id)
-        
-        # Test query (this will fail with authentication but should show the structure)
-        test_query = "Hello, can you help me check the status of my AWS resources?"
-        
-        logger.info(f"Testing with query: {test_query}")
-        
-        # This will likely fail due to authentication, but we can catch and analyze
-        try:
-            response = agent.invoke(test_query)
-            logger.info(f"✅ Agent response: {response}")
-        except Exception as invoke_error:
-            logger.warning(f"⚠️ Agent invocation failed (expected due to auth): {invoke_error}")
-            logger.info("This is expected when running locally without proper AWS credentials")
-        
-        return True
-        
-    except Exception as e:
-        logger.error(f"❌ Failed to test agent invocation: {e}")
-        return False
+        response = await agent.invoke_async(test_query)
+        logger.info("✅ Agent response: %s", response)
+    except Exception as invoke_error:
+        logger.warning("⚠️ Agent invocation failed (expected due to auth): %s", invoke_error)
+        logger.info("This is expected when running locally without proper AWS credentials")
 
 async def main():
     """Main test function"""
     logger.info("🧪 Starting Strands Host Agent Tests")
     logger.info("=" * 50)
     
-    # Test 1: Agent Creation
-    logger.info("\n📝 Test 1: Agent Creation")
-    creation_success = await test_agent_creation()
-    
-    # Test 2: Agent Invocation (will fail with auth but tests structure)
-    logger.info("\n📝 Test 2: Agent Invocation Structure")
-    invocation_success = await test_agent_invoke()
-    
-    # Summary
-    logger.info("\n" + "=" * 50)
-    logger.info("🏁 Test Summary:")
-    logger.info(f"   Agent Creation: {'✅ PASS' if creation_success else '❌ FAIL'}")
-    logger.info(f"   Agent Structure: {'✅ PASS' if invocation_success else '❌ FAIL'}")
-    
-    if creation_success and invocation_success:
+    # Test 1: Agent Creation, Test 2: Agent Invocation (will fail with auth but
+    # tests structure) - independent, so run them concurrently
+    try:
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(test_agent_creation())
+            tg.create_task(test_agent_invoke())
+    except* Exception as eg:
+        logger.info("\n" + "=" * 50)
+        logger.info("🏁 Test Summary:")
+        for error in eg.exceptions:
+            logger.error("   ❌ FAIL: %r", error)
+        logger.error("\n❌ Some tests failed. Check the logs above for details.")
+    else:
+        logger.info("\n" + "=" * 50)
+        logger.info("🏁 Test Summary: ✅ Agent Creation and Agent Structure passed")
         logger.info("\n🎉 All tests passed! The Strands host agent is properly configured.")
         logger.info("💡 To test with real AWS resources, deploy using the deployment script.")
-    else:
-        logger.error("\n❌ Some tests failed. Check the logs above for details.")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    _configure_logging()
+    try:
+        import uvloop
+    except ImportError:  # not available on Windows
+        asyncio.run(main())
+    else:
+        uvloop.run(main())
\ No newline at end of file
@@ -1,6 +1,19 @@
 import boto3
 from boto3.session import Session
+from functools import lru_cache
+import json
+import os
 import sys
+import threading
+import time
+
+# Parameter values are also kept on local disk so container restarts skip SSM
+SSM_CACHE_PATH = os.getenv("SSM_CACHE_PATH", "/tmp/ssm_cache.json")
+SSM_CACHE_TTL = int(os.getenv("SSM_CACHE_TTL", "300"))  # seconds
+SSM_GET_PARAMETERS_MAX = 10  # GetParameters limit per call
+
+# Serializes cache misses so concurrent callers fetch from SSM only once
+_SSM_FETCH_LOCK = threading.Lock()
 
 
 def get_ssm_parameter(name: str, with_decryption: bool = True) -> str:
@@ -10,6 +23,59 @@ def get_ssm_parameter(name: str, with_decryption: bool = True) -> str:
     return response["Parameter"]["Value"]
 
 
+def _read_ssm_cache() -> dict:
+    """Read unexpired {name: value} entries from the local SSM cache file."""
+    try:
+        with open(SSM_CACHE_PATH) as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    now = time.time()
+    return {name: value for name, (value, expiry) in entries.items() if expiry > now}
+
+
+def _write_ssm_cache(values: dict) -> None:
+    """Store parameter values in the local SSM cache file (best effort)."""
+    expiry = time.time() + SSM_CACHE_TTL
+    try:
+        fd = os.open(SSM_CACHE_PATH, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump({name: (value, expiry) for name, value in values.items()}, f)
+    except OSError as e:
+        print(f"Could not write SSM cache: {e}")
+
+
+@lru_cache(maxsize=None)
+def get_ssm_parameters(names: tuple[str, ...], with_decryption: bool = True) -> dict:
+    """Get several parameters from Parameter Store with batched GetParameters calls.
+
+    Results are cached in memory for the process and on disk for SSM_CACHE_TTL seconds.
+    """
+    cached = _read_ssm_cache()
+    if all(name in cached for name in names):
+        return {name: cached[name] for name in names}
+
+    with _SSM_FETCH_LOCK:
+        # Another caller may have filled the cache while we waited
+        cached = _read_ssm_cache()
+        values = {name: cached[name] for name in names if name in cached}
+        missing = [name for name in names if name not in values]
+
+        if missing:
+            ssm = boto3.client("ssm")
+            for i in range(0, len(missing), SSM_GET_PARAMETERS_MAX):
+                response = ssm.get_parameters(
+                    Names=missing[i:i + SSM_GET_PARAMETERS_MAX], WithDecryption=with_decryption
+                )
+                if response.get("InvalidParameters"):
+                    raise ValueError(f"SSM parameters not found: {response['InvalidParameters']}")
+                for parameter in response["Parameters"]:
+                    values[parameter["Name"]] = parameter["Value"]
+            _write_ssm_cache({**cached, **values})
+
+    return {name: values[name] for name in names}
+
+
 def get_aws_info():
     """Get AWS account ID and region from boto3 session."""
     try: